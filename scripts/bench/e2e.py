@@ -0,0 +1,185 @@
+"""End-to-end throughput/latency benchmark: runs app.run against local stand-ins.
+
+    PYTHONPATH=src python scripts/bench/e2e.py --pollers 1,4,16 --duration 20
+
+Each scenario runs in a fresh process, so CPU time and peak RSS belong to that scenario alone.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+TEMPLATE = "{id} price={price} amount={total_amount} served_at={served_at}"
+
+
+def build_config(base_url: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+    notifier: Dict[str, Any] = {"type": "telegram", "token": "BENCH", "api_base_url": base_url}
+    if opts["no_rate_limits"]:
+        notifier["rate_limits"] = {"global_per_second": 1e6, "chat_per_second": 1e6, "group_per_minute": 1e8}
+    pollers: Dict[str, Any] = {}
+    routes: List[Dict[str, Any]] = []
+    for i in range(opts["pollers"]):
+        name = f"bench_{i}"
+        pollers[name] = {
+            "type": "http_json",
+            "interval_seconds": opts["interval"],
+            "request": {"url": f"{base_url}/offers", "params": {"feed": i}, "timeout_seconds": 10},
+            "extract": {"items_jmespath": "data.list"},
+            "id_path": "id",
+            "fields": {
+                "price": "price",
+                "total_amount": "total_amount",
+                "value": "value",
+                "served_at": "served_at",
+            },
+            "post_process": {"where_gte": {"value": 0}},
+            "tracking": {"type": opts["strategy"]},
+        }
+        for r in range(opts["routes"]):
+            routes.append({
+                "name": f"{name}_route_{r}",
+                "match": {"poller_name": name},
+                "deliveries": [
+                    {"notifier": "bench", "chat_id": 1000 + c, "template": TEMPLATE} for c in range(opts["chats"])
+                ],
+            })
+    return {
+        "notifiers": {"bench": notifier},
+        "routes": routes,
+        "pollers": pollers,
+        "scheduler": {"jitter_ratio": 0.1},
+        "sharding": {"workers": opts["workers"]},
+    }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(opts: Dict[str, Any], results: Any) -> None:
+    # Runs in its own process; the stub servers run in yet another one.
+    logging.basicConfig(level=logging.WARNING)
+    from tg_notifier import app
+    from tg_notifier.metrics import EVENTS_TOTAL
+
+    ctx = mp.get_context("spawn")
+    port_queue = ctx.Queue()
+    stub_opts = {
+        "page_size": opts["page_size"],
+        "churn": opts["churn"],
+        "latency_ms": opts["latency_ms"],
+        "p429": opts["p429"],
+        "retry_after": opts["retry_after"],
+    }
+    stub = ctx.Process(target=stubs.serve, args=(port_queue, stub_opts), daemon=True)
+    stub.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+    workdir = tempfile.mkdtemp(prefix="tg-bench-")
+    os.chdir(workdir)
+    with open("config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(build_config(base_url, opts), f)
+
+    async def drive() -> None:
+        task = asyncio.create_task(app.run("config.yaml"))
+        await asyncio.sleep(opts["duration"])
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    asyncio.run(drive())
+    elapsed = time.perf_counter() - started
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Shard workers have exited and been reaped by now; the stub has not, so it is not counted.
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    stats = httpx.get(f"{base_url}/stats").json()
+    stub.terminate()
+
+    cpu = (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+    cpu += children.ru_utime + children.ru_stime
+    events = sum(child.value for child in EVENTS_TOTAL.children.values())
+    latencies = stats["latencies"]
+    results.put({
+        "pollers": opts["pollers"],
+        "workers": opts["workers"],
+        "routes": opts["routes"] * opts["pollers"],
+        "chats": opts["chats"],
+        "events_per_sec": events / elapsed,
+        "polls": stats["served"],
+        "sent": stats["sent"],
+        "rate_limited": stats["rate_limited"],
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "cpu_seconds": cpu,
+        "cpu_percent": 100 * cpu / elapsed,
+        # ru_maxrss is KiB on Linux; for children it is the largest single worker.
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "worker_rss_mb": children.ru_maxrss / 1024,
+    })
+
+
+COLUMNS = [
+    ("pollers", "{:>7}"), ("workers", "{:>7}"), ("routes", "{:>6}"), ("chats", "{:>5}"), ("events_per_sec", "{:>10.0f}"),
+    ("polls", "{:>6}"), ("sent", "{:>6}"), ("rate_limited", "{:>5}"), ("p50_ms", "{:>8.1f}"),
+    ("p99_ms", "{:>8.1f}"), ("cpu_percent", "{:>6.1f}"), ("peak_rss_mb", "{:>8.1f}"), ("worker_rss_mb", "{:>8.1f}"),
+]
+HEADERS = ["pollers", "workers", "routes", "chats", "events/s", "polls", "sent", "429s", "p50 ms", "p99 ms", "cpu%", "rss MB", "wkr MB"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pollers", default="1,4,16", help="comma-separated sweep of poller counts")
+    parser.add_argument("--workers", type=int, default=0, help="sharding.workers (0 = single process)")
+    parser.add_argument("--routes", type=int, default=1, help="routes per poller")
+    parser.add_argument("--chats", type=int, default=1, help="chats per route")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--churn", type=float, default=0.2, help="fraction of offers replaced per request")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="offers API response latency")
+    parser.add_argument("--p429", type=float, default=0.02, help="probability of a Telegram 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--interval", type=int, default=1, help="poll interval_seconds")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--strategy", default="lowest_price", choices=["lowest_price", "forward"])
+    parser.add_argument("--no-rate-limits", action="store_true", help="lift the notifier's Telegram rate limits")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per scenario")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    if not args.json:
+        print("  ".join(HEADERS))
+    for pollers in [int(n) for n in args.pollers.split(",") if n]:
+        opts = vars(args).copy()
+        opts["pollers"] = pollers
+        results = ctx.Queue()
+        proc = ctx.Process(target=run_scenario, args=(opts, results))
+        proc.start()
+        row = results.get(timeout=args.duration + 120)
+        proc.join()
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print("  ".join(fmt.format(row[key]) for key, fmt in COLUMNS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Micro-benchmarks for the hot paths: fetch+parse+extract, filtering, rendering, state writes.
+
+    PYTHONPATH=src python scripts/bench/micro.py --items 200 --repeat 5
+
+No network: HTTP goes through httpx.MockTransport and state goes to a temp directory.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from tg_notifier.filters import compile_filter  # noqa: E402
+from tg_notifier.pollers.http_json import HTTPJSONPoller  # noqa: E402
+from tg_notifier.state import FileStateStore  # noqa: E402
+from tg_notifier.utils import compile_template, format_numbers_in_mapping, render_template  # noqa: E402
+
+TEMPLATE = "🛒 {symbol} 新挂出: 单价=${price} 数量={total_amount} 总价值=${value} id={__id__}"
+FIELDS = {"symbol": "symbol", "price": "price", "total_amount": "total_amount", "value": "value"}
+
+
+def make_items(n: int, rng: random.Random, start: int = 1) -> List[Dict[str, Any]]:
+    items = []
+    for i in range(start, start + n):
+        price = round(rng.uniform(0.5, 2.0), 4)
+        amount = rng.randint(1000, 50000)
+        items.append({"id": i, "symbol": "WLFI", "price": price, "total_amount": amount, "value": round(price * amount, 2)})
+    return items
+
+
+def report(name: str, ops: int, seconds: float) -> None:
+    us = seconds / ops * 1e6
+    print(f"{name:<44} {us:>12.2f} µs/op {ops / seconds:>14.0f} ops/s")
+
+
+def bench_sync(name: str, fn: Callable[[], Any], repeat: int, number: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    report(name, number, best)
+
+
+async def bench_async(name: str, fn: Callable[[], Awaitable[Any]], repeat: int, number: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        best = min(best, time.perf_counter() - started)
+    report(name, number, best)
+
+
+async def bench_fetch(args: argparse.Namespace, stream: bool) -> None:
+    rng = random.Random(1)
+    items = make_items(args.items, rng)
+    counter = {"n": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # A fresh body each time, so the unchanged-body shortcut never kicks in.
+        counter["n"] += 1
+        items[0]["id"] = -counter["n"]
+        return httpx.Response(200, content=json.dumps({"data": {"list": items}}).encode("utf-8"))
+
+    poller = HTTPJSONPoller(
+        name="bench",
+        request={"url": "http://bench.invalid/offers"},
+        extract={"items_jmespath": "data.list", "stream": stream},
+        interval_seconds=1,
+        id_path="id",
+        fields=FIELDS,
+    )
+    poller.source.fresh_seconds = 0
+    poller.source._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    label = "stream" if stream else "buffered"
+    await bench_async(f"fetch+parse+extract {label} ({args.items} items)", poller._fetch, args.repeat, args.number // 10 or 1)
+    await poller.close()
+
+
+def bench_filter(args: argparse.Namespace) -> None:
+    rng = random.Random(2)
+    events = [dict(item, __id__=str(item["id"])) for item in make_items(args.items, rng)]
+    opt = {"where_gte": {"value": 20000}, "where_lte": {"price": 1.5}, "where": {"symbol": "WLFI"}}
+    event_filter = compile_filter(opt)
+    bench_sync(f"CompiledFilter ({args.items} events)", lambda: event_filter(events), args.repeat, args.number)
+
+
+def bench_render(args: argparse.Namespace) -> None:
+    rng = random.Random(3)
+    event = dict(make_items(1, rng)[0], __id__="1")
+    compiled = compile_template(TEMPLATE)
+    number = args.number * 10
+    bench_sync(
+        "render_template(format_numbers_in_mapping)",
+        lambda: render_template(TEMPLATE, format_numbers_in_mapping(event)),
+        args.repeat,
+        number,
+    )
+    bench_sync("compile_template().render", lambda: compiled.render(event), args.repeat, number)
+
+
+async def bench_state(args: argparse.Namespace) -> None:
+    root = tempfile.mkdtemp(prefix="tg-bench-state-")
+    state = FileStateStore(root)
+    rng = random.Random(4)
+    seq = {"n": 0}
+
+    async def mark_seen() -> None:
+        seq["n"] += 1
+        await state.mark_seen("bench", {f"{seq['n']}-{i}" for i in range(10)})
+
+    async def save_present() -> None:
+        seq["n"] += 1
+        ids = {str(i) for i in range(seq["n"], seq["n"] + args.items)}
+        await state.save_current_present_ids("bench", ids)
+
+    async def save_tracking() -> None:
+        seq["n"] += 1
+        await state.save_tracking("bench", {"id": str(seq["n"]), "price": rng.uniform(0.5, 2.0)})
+
+    try:
+        number = args.number // 10 or 1
+        await bench_async("FileStateStore.mark_seen (10 keys)", mark_seen, args.repeat, number)
+        await bench_async(f"FileStateStore.save_current_present_ids ({args.items})", save_present, args.repeat, number)
+        await bench_async("FileStateStore.save_tracking", save_tracking, args.repeat, number)
+    finally:
+        await state.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def run_all(args: argparse.Namespace) -> None:
+    await bench_fetch(args, stream=False)
+    await bench_fetch(args, stream=True)
+    bench_filter(args)
+    bench_render(args)
+    await bench_state(args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="items per response / events per batch")
+    parser.add_argument("--number", type=int, default=1000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the best one is reported")
+    args = parser.parse_args()
+    asyncio.run(run_all(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Local stand-ins for the offers API and the Telegram Bot API, used by the benchmarks.
+
+Run standalone for manual testing:
+
+    python scripts/bench/stubs.py --port 8081 --page-size 200 --churn 0.05 --p429 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+_SERVED_AT = re.compile(r"served_at=(\d+\.\d+)")
+
+
+class StubState:
+    def __init__(
+        self,
+        page_size: int = 200,
+        churn: float = 0.05,
+        latency_ms: float = 0.0,
+        p429: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 1,
+    ) -> None:
+        self.page_size = page_size
+        self.churn = churn
+        self.latency_ms = latency_ms
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.feeds: Dict[str, List[Dict[str, Any]]] = {}
+        self.next_id = 1
+        self.served = 0
+        self.sent = 0
+        self.rate_limited = 0
+        self.latencies: List[float] = []
+
+    def _offer(self) -> Dict[str, Any]:
+        offer_id = self.next_id
+        self.next_id += 1
+        price = round(self.rng.uniform(0.5, 2.0), 4)
+        amount = self.rng.randint(1000, 50000)
+        return {"id": offer_id, "price": price, "total_amount": amount, "value": round(price * amount, 2)}
+
+    def page(self, feed: str) -> bytes:
+        # Each request replaces `churn` of the feed's offers, so consecutive snapshots differ.
+        with self.lock:
+            offers = self.feeds.get(feed)
+            if offers is None:
+                offers = self.feeds[feed] = [self._offer() for _ in range(self.page_size)]
+            else:
+                for _ in range(int(round(self.churn * len(offers)))):
+                    offers[self.rng.randrange(len(offers))] = self._offer()
+            self.served += 1
+            served_at = "%.6f" % time.time()
+            listing = sorted(offers, key=lambda o: o["price"])
+            body = {"data": {"list": [dict(o, served_at=served_at) for o in listing]}}
+        return json.dumps(body).encode("utf-8")
+
+    def send_message(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Returns the 429 body to answer with, or None when the message is accepted.
+        with self.lock:
+            if self.p429 and self.rng.random() < self.p429:
+                self.rate_limited += 1
+                return {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after %d" % self.retry_after,
+                    "parameters": {"retry_after": self.retry_after},
+                }
+            self.sent += 1
+            m = _SERVED_AT.search(str(payload.get("text") or ""))
+            if m:
+                self.latencies.append(time.time() - float(m.group(1)))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "served": self.served,
+                "sent": self.sent,
+                "rate_limited": self.rate_limited,
+                "latencies": list(self.latencies),
+            }
+
+
+def make_handler(state: StubState) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _reply(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                self._reply(200, json.dumps(state.stats()).encode("utf-8"))
+                return
+            if url.path == "/offers":
+                if state.latency_ms:
+                    time.sleep(state.latency_ms / 1000)
+                feed = (parse_qs(url.query).get("feed") or ["0"])[0]
+                self._reply(200, state.page(feed))
+                return
+            self._reply(404, b'{"ok":false}')
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.startswith("/bot"):
+                self._reply(404, b'{"ok":false}')
+                return
+            rejected = state.send_message(payload)
+            if rejected is not None:
+                self._reply(429, json.dumps(rejected).encode("utf-8"))
+                return
+            self._reply(200, json.dumps({"ok": True, "result": {"message_id": state.sent}}).encode("utf-8"))
+
+    return Handler
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients hanging up mid-response during shutdown are expected here.
+        pass
+
+
+def serve(port_queue: Any, options: Dict[str, Any], port: int = 0) -> None:
+    # Entry point for a stub subprocess: reports the bound port, then serves forever.
+    state = StubState(**options)
+    server = _QuietServer(("127.0.0.1", port), make_handler(state))
+    if port_queue is not None:
+        port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--churn", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    options = {
+        "page_size": args.page_size,
+        "churn": args.churn,
+        "latency_ms": args.latency_ms,
+        "p429": args.p429,
+        "retry_after": args.retry_after,
+    }
+    print(f"Offers: http://127.0.0.1:{args.port}/offers  Telegram: http://127.0.0.1:{args.port}/bot<token>/")
+    serve(None, options, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,36 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
-from typing import Any, Dict, List, Tuple, Optional
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional
 
+from .capture import CaptureWriter, replay_capture
+from .filters import compile_filter
 from .utils import configure_logging, load_yaml_with_env
+from .notifiers.sink import SinkNotifier
 from .notifiers.telegram import TelegramNotifier
-from .pollers.http_json import HTTPJSONPoller
+from .pollers.http_json import HTTPJSONPoller, HTTPJSONSource, request_signature
+from .pollers.push import PUSH_TYPES, PushPoller, WebhookPoller, WebhookServer, WebSocketPoller
+from .metrics import ALERTS_TOTAL, REGISTRY, MetricsServer
+from .pipeline import Pipeline
+from .reload import RELOADABLE, ConfigWatcher, SectionDiff, diff_section, restart_only_changes
 from .routing.router import Router
+from .scheduler import PollScheduler
+from .sharding import ShardSupervisor, assign_shards
 from .state.file_state import FileStateStore
+from .state.outbox import Outbox
+from .tracking import build_strategy
+from .transport import TransportManager
 
 
 STATE_DIR = ".state"
+DEFAULT_DEDUPE_WINDOW_SECONDS = 24 * 3600
 
 
-def build_notifiers(config: Dict[str, Any]) -> Dict[str, Any]:
+def build_notifiers(config: Dict[str, Any], transport: Optional[TransportManager] = None) -> Dict[str, Any]:
     result: Dict[str, Any] = {}
     for name, conf in (config.get("notifiers") or {}).items():
         type_ = conf.get("type")
@@ -23,176 +40,410 @@ def build_notifiers(config: Dict[str, Any]) -> Dict[str, Any]:
             result[name] = TelegramNotifier(
                 token=conf.get("token"),
                 default_parse_mode=conf.get("default_parse_mode"),
+                rate_limits=conf.get("rate_limits"),
+                max_retries=int(conf.get("max_retries", 5)),
+                transport=transport,
+                name=name,
+                api_base_url=conf.get("api_base_url"),
             )
+        elif type_ == "sink":
+            result[name] = SinkNotifier(name=name, path=conf.get("path"))
     return result
 
 
-def build_pollers(config: Dict[str, Any]) -> Tuple[Dict[str, HTTPJSONPoller], Dict[str, Dict[str, Any]]]:
+def build_pollers(
+    config: Dict[str, Any],
+    transport: Optional[TransportManager] = None,
+    capture: Optional[CaptureWriter] = None,
+    sources: Optional[Dict[str, HTTPJSONSource]] = None,
+) -> Dict[str, HTTPJSONPoller]:
+    # `sources` (request signature -> source) lets a config reload attach new pollers to live sources.
     pollers: Dict[str, HTTPJSONPoller] = {}
-    options: Dict[str, Dict[str, Any]] = {}
+    sources = {} if sources is None else sources
     for name, conf in (config.get("pollers") or {}).items():
         type_ = conf.get("type")
         if type_ == "http_json":
+            request = conf.get("request") or {}
+            extract = conf.get("extract") or {}
+            interval_seconds = int(conf.get("interval_seconds", 15))
+            # Pollers with an identical request share one fetch and parse per interval.
+            signature = request_signature(request, extract)
+            if signature not in sources:
+                sources[signature] = HTTPJSONSource(request, extract, interval_seconds, transport, capture)
             pollers[name] = HTTPJSONPoller(
                 name=name,
-                request=conf.get("request") or {},
-                extract=conf.get("extract") or {},
-                interval_seconds=int(conf.get("interval_seconds", 15)),
+                request=request,
+                extract=extract,
+                interval_seconds=interval_seconds,
                 id_path=conf.get("id_path"),
                 updated_at_path=conf.get("updated_at_path"),
                 fields=conf.get("fields") or {},
+                source=sources[signature],
+                transport=transport,
+                keep_raw=bool(conf.get("keep_raw", False)),
+                event_filter=compile_filter(conf.get("post_process")),
+                min_interval_seconds=conf.get("min_interval_seconds"),
+                dedupe_key_fields=(conf.get("post_process") or {}).get("dedupe_key_fields"),
+                capture=capture,
             )
-            if conf.get("post_process"):
-                options[name] = conf["post_process"]
-    return pollers, options
-
-
-def _apply_post_process(unseen: List[Dict[str, Any]], opt: Dict[str, Any]) -> List[Dict[str, Any]]:
-    pick = opt.get("pick") or {}
-    if pick.get("type") == "lowest_by":
-        key = pick.get("key")
-        if key and unseen:
-            try:
-                return [min(unseen, key=lambda x: float(x.get(key) or 0))]
-            except Exception:
-                return unseen[:1]
-    return unseen
-
-
-def _apply_pre_filter(events: List[Dict[str, Any]], opt: Dict[str, Any]) -> List[Dict[str, Any]]:
-    result = events
-    where = opt.get("where") or {}
-    if where:
-        result = [e for e in result if all(e.get(f) == val for f, val in where.items())]
-    where_gte = opt.get("where_gte") or {}
-    if where_gte:
-        filtered: List[Dict[str, Any]] = []
-        for e in result:
-            ok = True
-            for f, min_val in where_gte.items():
-                try:
-                    v = float(e.get(f) or 0)
-                    if v < float(min_val):
-                        ok = False
-                        break
-                except Exception:
-                    ok = False
-                    break
-            if ok:
-                filtered.append(e)
-        result = filtered
-    return result
+    return pollers
+
+
+def build_push_pollers(config: Dict[str, Any], webhooks: WebhookServer) -> Dict[str, PushPoller]:
+    # Webhook and WebSocket sources: same fields/id_path/post_process config as http_json,
+    # but events arrive as the upstream sends them instead of once per interval.
+    pollers: Dict[str, PushPoller] = {}
+    for name, conf in (config.get("pollers") or {}).items():
+        type_ = conf.get("type")
+        if type_ not in PUSH_TYPES:
+            continue
+        common: Dict[str, Any] = dict(
+            extract=conf.get("extract") or {},
+            snapshot=bool(conf.get("snapshot", False)),
+            id_path=conf.get("id_path"),
+            updated_at_path=conf.get("updated_at_path"),
+            fields=conf.get("fields") or {},
+            keep_raw=bool(conf.get("keep_raw", False)),
+            event_filter=compile_filter(conf.get("post_process")),
+            dedupe_key_fields=(conf.get("post_process") or {}).get("dedupe_key_fields"),
+        )
+        if type_ == "webhook":
+            pollers[name] = WebhookPoller(name, webhooks, path=conf.get("path"), secret=conf.get("secret"), **common)
+        else:
+            pollers[name] = WebSocketPoller(
+                name,
+                url=conf["url"],
+                headers=conf.get("headers"),
+                subscribe=conf.get("subscribe"),
+                reconnect_seconds=float(conf.get("reconnect_seconds", 1)),
+                max_reconnect_seconds=float(conf.get("max_reconnect_seconds", 60)),
+                ping_interval_seconds=conf.get("ping_interval_seconds", 20),
+                **common,
+            )
+    return pollers
+
+
+def poller_strategy_conf(conf: Dict[str, Any]) -> Dict[str, Any]:
+    # Pushed deltas are not a full book, so push sources forward them as-is by default.
+    if conf.get("type") in PUSH_TYPES and not conf.get("snapshot"):
+        return {**conf, "tracking": {"type": "forward", **(conf.get("tracking") or {}), "snapshot": False}}
+    return conf
+
+
+def build_dedupe_options(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Options for each poller's fingerprint store, the seen-key store alerts are deduped against;
+    # a poller's `dedupe` block (capacity, ttl_seconds, bloom) overrides the post_process values.
+    dedupe_options: Dict[str, Dict[str, Any]] = {}
+    for name, conf in (config.get("pollers") or {}).items():
+        post_process = conf.get("post_process") or {}
+        if post_process.get("dedupe_key_fields"):
+            dedupe_options[FileStateStore.fingerprint_store_name(name)] = {
+                "ttl_seconds": float(post_process.get("dedupe_window_seconds", DEFAULT_DEDUPE_WINDOW_SECONDS)),
+                "capacity": int(post_process.get("dedupe_capacity", 10_000)),
+                **(conf.get("dedupe") or {}),
+            }
+    return dedupe_options
+
+
+class LiveConfig:
+    # Applies a reloaded config to the running process. Only pollers, notifiers and routes that
+    # changed are rebuilt; everything else keeps its pooled connections, shared sources, dedupe
+    # caches and tracking state. Removed pollers stop being scheduled, and a changed poller is
+    # replaced by a fresh one that picks its state back up from the store.
+    def __init__(
+        self,
+        config_path: str,
+        config: Dict[str, Any],
+        transport: TransportManager,
+        capture: Optional[CaptureWriter],
+        notifiers: Dict[str, Any],
+        router: Router,
+        pollers: Dict[str, HTTPJSONPoller],
+        sources: Dict[str, HTTPJSONSource],
+        state: FileStateStore,
+        pipeline: Pipeline,
+        scheduler: PollScheduler,
+        webhooks: WebhookServer,
+        reload_pollers: bool = True,
+    ) -> None:
+        self.config_path = config_path
+        self.config = config
+        self.transport = transport
+        self.capture = capture
+        self.notifiers = notifiers
+        self.router = router
+        self.pollers = pollers
+        self.sources = sources
+        self.state = state
+        self.pipeline = pipeline
+        self.scheduler = scheduler
+        self.webhooks = webhooks
+        self.push_pollers: Dict[str, PushPoller] = {}
+        # Push sources only start once the process is running continuously.
+        self.push_started = False
+        # With sharding the workers own the pollers and read the config at their own start.
+        self.reload_pollers = reload_pollers
+
+    def add_poller(self, name: str, poller: HTTPJSONPoller, conf: Dict[str, Any]) -> None:
+        self.pollers[name] = poller
+        self.pipeline.set_strategy(name, build_strategy(name, conf))
+        self.scheduler.add(
+            poller,
+            self.pipeline.submit,
+            min_interval_seconds=conf.get("min_interval_seconds"),
+            max_interval_seconds=conf.get("max_interval_seconds"),
+        )
+
+    async def add_push_poller(self, name: str, poller: PushPoller, conf: Dict[str, Any]) -> None:
+        self.push_pollers[name] = poller
+        self.pipeline.set_strategy(name, build_strategy(name, poller_strategy_conf(conf)))
+        if self.push_started:
+            await poller.start(self.pipeline.submit if poller.snapshot else self.pipeline.push)
 
+    async def start_push(self) -> None:
+        self.push_started = True
+        for poller in self.push_pollers.values():
+            await poller.start(self.pipeline.submit if poller.snapshot else self.pipeline.push)
 
-async def run(config_path: str, once: bool = False) -> None:
+    async def _remove_poller(self, name: str) -> None:
+        push = self.push_pollers.pop(name, None)
+        if push is not None:
+            await push.close()
+            self.pipeline.set_strategy(name, None)
+            return
+        poller = self.pollers.pop(name, None)
+        if poller is None:
+            return
+        self.scheduler.remove(poller)
+        self.pipeline.set_strategy(name, None)
+        source = poller.source
+        source.detach(poller)
+        if not source.subscribers:
+            for signature, s in list(self.sources.items()):
+                if s is source:
+                    del self.sources[signature]
+            await source.close()
+
+    async def reload(self) -> None:
+        log = logging.getLogger(__name__)
+        new = await asyncio.to_thread(load_yaml_with_env, self.config_path)
+        old = self.config
+        restart = restart_only_changes(old, new)
+        if restart:
+            log.warning("Config reload: changes to %s need a restart", ", ".join(sorted(restart)))
+
+        notifier_diff = diff_section(old.get("notifiers"), new.get("notifiers"))
+        poller_diff = diff_section(old.get("pollers"), new.get("pollers"))
+        if not self.reload_pollers:
+            # Push sources stay in this process; polled ones belong to the shard workers.
+            polled = {
+                name
+                for section in (old.get("pollers") or {}, new.get("pollers") or {})
+                for name, conf in section.items()
+                if conf.get("type") not in PUSH_TYPES
+            }
+            if any(names & polled for names in poller_diff):
+                log.warning("Config reload: polled source changes need a restart when sharding is enabled")
+            poller_diff = SectionDiff(*(names - polled for names in poller_diff))
+        routes_changed = (old.get("routes") or []) != (new.get("routes") or [])
+        if not (any(notifier_diff) or any(poller_diff) or routes_changed):
+            log.info("Config reload: no reloadable changes")
+            return
+
+        # Notifiers first, so rebuilt routes bind to the new instances.
+        new_notifiers = new.get("notifiers") or {}
+        stale = [self.notifiers.pop(name) for name in notifier_diff.removed | notifier_diff.changed]
+        self.notifiers.update(
+            build_notifiers(
+                {"notifiers": {name: new_notifiers[name] for name in notifier_diff.added | notifier_diff.changed}},
+                self.transport,
+            )
+        )
+        if any(notifier_diff) or routes_changed:
+            self.router.set_routes(new.get("routes") or [])
+
+        new_pollers = new.get("pollers") or {}
+        for name in poller_diff.removed | poller_diff.changed:
+            await self._remove_poller(name)
+        # Dedupe stores already loaded keep their capacity/TTL; new ones use the new options.
+        self.state.dedupe_options.clear()
+        self.state.dedupe_options.update(build_dedupe_options({"pollers": new_pollers}))
+        started = build_pollers(
+            {"pollers": {name: new_pollers[name] for name in poller_diff.added | poller_diff.changed}},
+            self.transport,
+            self.capture,
+            self.sources,
+        )
+        for name, poller in started.items():
+            self.add_poller(name, poller, new_pollers[name])
+        pushed = build_push_pollers(
+            {"pollers": {name: new_pollers[name] for name in poller_diff.added | poller_diff.changed}},
+            self.webhooks,
+        )
+        for name, push in pushed.items():
+            await self.add_push_poller(name, push, new_pollers[name])
+
+        await asyncio.gather(*[n.close() for n in stale if hasattr(n, "close")])
+        self.config = {
+            **old,
+            **{key: new.get(key) for key in RELOADABLE},
+        }
+        if not self.reload_pollers:
+            # Keep the running polled entries, so a later reload still compares against them.
+            self.config["pollers"] = {
+                **{n: c for n, c in (old.get("pollers") or {}).items() if c.get("type") not in PUSH_TYPES},
+                **{n: c for n, c in (new.get("pollers") or {}).items() if c.get("type") in PUSH_TYPES},
+            }
+        log.info(
+            "Config reload: pollers +%d -%d ~%d, notifiers +%d -%d ~%d, routes %s",
+            len(poller_diff.added), len(poller_diff.removed), len(poller_diff.changed),
+            len(notifier_diff.added), len(notifier_diff.removed), len(notifier_diff.changed),
+            "rebuilt" if routes_changed or any(notifier_diff) else "unchanged",
+        )
+
+
+async def run(
+    config_path: str,
+    once: bool = False,
+    record: Optional[str] = None,
+    replay: Optional[str] = None,
+    sink_output: Optional[str] = None,
+) -> None:
+    # record: append every changed raw poll response to a capture file.
+    # replay: feed a capture through filter/track/route as fast as possible instead of polling,
+    # with every notifier replaced by a sink and state kept in a throwaway directory.
     configure_logging(logging.INFO)
     config = load_yaml_with_env(config_path)
 
-    notifiers = build_notifiers(config)
-    router = Router(notifiers)
-    pollers, poller_opts = build_pollers(config)
-    state = FileStateStore(STATE_DIR)
-
-    async def worker(poller_name: str, poller: HTTPJSONPoller) -> None:
-        opt = poller_opts.get(poller_name) or {}
-        price_key = (opt.get("pick") or {}).get("key") or "price"
-        while True:
-            async for events in poller.poll():
-                if not events:
-                    if once:
-                        break
-                    continue
-                # pre-filter
-                events = _apply_pre_filter(events, opt)
-                if not events:
-                    if once:
-                        break
-                    continue
-                # find current lowest by price_key among ALL current events (not just unseen)
-                try:
-                    current_lowest = min(events, key=lambda x: float(x.get(price_key) or 0))
-                except Exception:
-                    current_lowest = events[0]
-
-                tracking = await state.load_tracking(poller_name)
-                tracking_id = tracking.get("id") if tracking else None
-                tracking_price = tracking.get("price") if tracking else None
-
-                # If no tracking yet -> start tracking and notify this lowest
-                if not tracking:
-                    await state.save_tracking(poller_name, {
-                        "id": current_lowest.get("__id__") or current_lowest.get("id"),
-                        "price": current_lowest.get(price_key),
-                        "total_amount": current_lowest.get("total_amount"),
-                        "value": current_lowest.get("value"),
-                    })
-                    msg = "🛒 WLFI 新挂出最低价: 单价=${price} 数量=${total_amount} 总金额=${value} 前往：https://pro.whales.market/pre/Ethereum/WLFI?id={id} 购买"
-                    current_lowest["id"] = current_lowest.get("__id__") or current_lowest.get("id")
-                    current_lowest["__template__"] = msg
-                    await router.deliverers(config.get("routes") or [], poller_name, [current_lowest])
-                else:
-                    # Is tracking order still present?
-                    still_present = any((e.get("__id__") or e.get("id")) == tracking_id for e in events)
-                    current_lowest_price = float(current_lowest.get(price_key) or 0)
-                    tracking_price_f = float(tracking_price or 0)
-
-                    if not still_present:
-                        # Tracked order eaten/removed -> notify removal and new lowest
-                        removal_msg = "✅ 之前最低价已成交或撤单: 单价=${price} 数量=${total_amount} 总金额=${value}\n➡️ 当前最新最低价: 单价=${new_price} 数量=${new_total} 总金额=${new_value}"
-                        payload = {
-                            "price": tracking.get("price"),
-                            "total_amount": tracking.get("total_amount"),
-                            "value": tracking.get("value"),
-                            "new_price": current_lowest.get(price_key),
-                            "new_total": current_lowest.get("total_amount"),
-                            "new_value": current_lowest.get("value"),
-                            "__template__": removal_msg,
-                        }
-                        await router.deliverers(config.get("routes") or [], poller_name, [payload])
-                        await state.save_tracking(poller_name, {
-                            "id": current_lowest.get("__id__") or current_lowest.get("id"),
-                            "price": current_lowest.get(price_key),
-                            "total_amount": current_lowest.get("total_amount"),
-                            "value": current_lowest.get("value"),
-                        })
-                    else:
-                        # If still present but a lower price appears -> switch tracking and notify new lowest
-                        if current_lowest_price < tracking_price_f:
-                            switch_msg = "🛒 出现更低价新挂单: 单价=${price} 数量=${total_amount} 总金额=${value} 前往：https://pro.whales.market/pre/Ethereum/WLFI?id={id} 购买"
-                            current_lowest["id"] = current_lowest.get("__id__") or current_lowest.get("id")
-                            current_lowest["__template__"] = switch_msg
-                            await router.deliverers(config.get("routes") or [], poller_name, [current_lowest])
-                            await state.save_tracking(poller_name, {
-                                "id": current_lowest.get("__id__") or current_lowest.get("id"),
-                                "price": current_lowest.get(price_key),
-                                "total_amount": current_lowest.get("total_amount"),
-                                "value": current_lowest.get("value"),
-                            })
-                        # else: do nothing
-
-                if once:
-                    break
-            if once:
-                break
+    transport = TransportManager(config.get("transport"))
+    if replay:
+        sink = SinkNotifier(name="replay", path=sink_output)
+        notifiers: Dict[str, Any] = {name: sink for name in (config.get("notifiers") or {})}
+        state_dir = tempfile.mkdtemp(prefix="tg-replay-")
+    else:
+        notifiers = build_notifiers(config, transport)
+        state_dir = STATE_DIR
+    state = FileStateStore(state_dir, dedupe_options=build_dedupe_options(config))
+    router = Router(notifiers, config.get("routes") or [], state)
+    capture = CaptureWriter(record) if record and not replay else None
+    sources: Dict[str, HTTPJSONSource] = {}
+    pollers = build_pollers(config, transport, capture, sources)
+    # Push sources need a live process to receive into; replay only feeds recorded polls.
+    webhooks = WebhookServer(config.get("webhook"))
+    push_pollers = {} if replay else build_push_pollers(config, webhooks)
 
-    tasks = [asyncio.create_task(worker(name, poller)) for name, poller in pollers.items()]
-    if not tasks:
+    if not (pollers or push_pollers):
         logging.getLogger(__name__).warning("No pollers configured. Exiting.")
         return
 
+    poller_confs = config.get("pollers") or {}
+    outbox = Outbox(state_dir, state)
+    pipeline_conf = config.get("pipeline") or {}
+    if replay:
+        pipeline_conf = {**pipeline_conf, "snapshot_overflow": "block"}
+    pipeline = Pipeline(router, state, {}, pipeline_conf, outbox)
+    scheduler = PollScheduler(config.get("scheduler"))
+    live = LiveConfig(
+        config_path, config, transport, capture, notifiers, router, {}, sources, state, pipeline, scheduler, webhooks
+    )
+    for name, poller in pollers.items():
+        live.add_poller(name, poller, poller_confs.get(name) or {})
+    for name, push in push_pollers.items():
+        await live.add_push_poller(name, push, poller_confs.get(name) or {})
+    pollers = live.pollers
+
+    # Optional sharding: pollers run in worker processes and only their event batches reach
+    # this process, which keeps the pipeline, state and notifiers.
+    sharding = config.get("sharding") or {}
+    workers = int(sharding.get("workers") or 0)
+    supervisor: Optional[ShardSupervisor] = None
+    if workers > 1 and pollers and not replay:
+        if record:
+            logging.getLogger(__name__).warning("--record captures in-process only; sharding disabled")
+        else:
+            shards = assign_shards({name: poller_confs.get(name) or {} for name in pollers}, workers)
+            socket_path = os.path.join(state_dir, "shards.sock")
+            supervisor = ShardSupervisor(config_path, shards, pipeline.submit, socket_path, sharding)
+            live.reload_pollers = False
+
+    # Hot reload: the config file is watched (and SIGHUP forces a check) while running continuously.
+    watcher: Optional[ConfigWatcher] = None
+    if not (once or replay):
+        watcher = ConfigWatcher(config_path, live.reload, config.get("reload"))
+
+    metrics = MetricsServer(config.get("metrics"))
+    REGISTRY.gauge(
+        "tg_queue_depth", "Items waiting in each pipeline queue", ("queue",),
+        lambda: {(name,): depth for name, depth in pipeline.queue_depths().items()},
+    )
+    REGISTRY.gauge(
+        "tg_notifier_queue_depth", "Telegram calls waiting for rate-limit budget or retry", ("notifier",),
+        lambda: {(name,): n.queue_depth for name, n in notifiers.items() if hasattr(n, "queue_depth")},
+    )
+    REGISTRY.gauge("tg_outbox_pending", "Messages committed but not yet acknowledged", (), lambda: {(): len(outbox)})
+
+    pipeline.start()
     try:
-        await asyncio.gather(*tasks)
+        await metrics.start()
+        if replay:
+            await _replay(replay, pollers, pipeline, sink)
+        else:
+            await pipeline.replay()
+            if watcher is not None:
+                watcher.start()
+            if once:
+                if push_pollers:
+                    logging.getLogger(__name__).info("--once: push sources are not started")
+            else:
+                await live.start_push()
+            if supervisor is not None:
+                await supervisor.run(once=once)
+            else:
+                await scheduler.run(once=once)
+            await pipeline.join()
     finally:
+        if watcher is not None:
+            await watcher.close()
+        await asyncio.gather(*[p.close() for p in live.push_pollers.values()])
+        await webhooks.close()
+        await metrics.close()
+        await pipeline.close()
+        await outbox.close()
         await asyncio.gather(*[n.close() for n in notifiers.values() if hasattr(n, "close")])
         await asyncio.gather(*[p.close() for p in pollers.values() if hasattr(p, "close")])
+        await transport.close()
+        await state.close()
+        if capture is not None:
+            await capture.close()
+        if replay:
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+
+async def _replay(path: str, pollers: Dict[str, HTTPJSONPoller], pipeline: Pipeline, sink: SinkNotifier) -> None:
+    sources = {p.source.name: p.source for p in pollers.values()}
+    alerts_before = sum(child.value for child in ALERTS_TOTAL.children.values())
+    started = time.perf_counter()
+    stats = await replay_capture(path, sources, pipeline.submit)
+    await pipeline.join()
+    elapsed = time.perf_counter() - started
+    alerts = sum(child.value for child in ALERTS_TOTAL.children.values()) - alerts_before
+    logging.getLogger(__name__).info(
+        "Replay: %d response(s) spanning %.0fs replayed in %.2fs (%.0f events/s): %d event(s), %d alert(s), %d message(s)",
+        stats["frames"], stats["span_seconds"], elapsed, stats["events"] / elapsed if elapsed else 0.0,
+        stats["events"], alerts, sink.stats["sent"],
+    )
+    logging.getLogger(__name__).info("Metrics: %s", REGISTRY.summary())
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", required=True, help="Path to config.yaml")
     parser.add_argument("--once", action="store_true", help="Run one fetch cycle then exit")
+    parser.add_argument("--record", metavar="PATH", help="Append raw poll responses to a capture file")
+    parser.add_argument("--replay", metavar="PATH", help="Replay a capture file through the pipeline, no network")
+    parser.add_argument("--sink-output", metavar="PATH", help="With --replay: write sent messages as JSON lines")
     args = parser.parse_args()
-    asyncio.run(run(args.config, once=args.once))
+    asyncio.run(run(args.config, once=args.once, record=args.record, replay=args.replay, sink_output=args.sink_output))
 
 
 if __name__ == "__main__":
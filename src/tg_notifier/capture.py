@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from .metrics import EVENTS_TOTAL
+from .utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TGCAP1\n"
+# The file is MAGIC followed by blocks: compressed length (u32) + zlib-compressed frame.
+# A frame is timestamp (f64), source name length (u16), page count (u16), the name, then per
+# page its length (u32) and raw body bytes. Blocks are independent, so a block torn by a crash
+# is cut off when the file is next opened for appending and never hides the ones after it.
+_BLOCK = struct.Struct("<I")
+_FRAME = struct.Struct("<dHH")
+_PAGE = struct.Struct("<I")
+
+
+class CaptureRecord(NamedTuple):
+    ts: float
+    source: str
+    pages: List[bytes]
+
+
+def _encode(record: CaptureRecord) -> bytes:
+    name = record.source.encode("utf-8")
+    parts = [_FRAME.pack(record.ts, len(name), len(record.pages)), name]
+    for page in record.pages:
+        parts.append(_PAGE.pack(len(page)))
+        parts.append(page)
+    return b"".join(parts)
+
+
+def _decode(frame: bytes) -> CaptureRecord:
+    ts, name_len, page_count = _FRAME.unpack_from(frame, 0)
+    pos = _FRAME.size
+    source = frame[pos:pos + name_len].decode("utf-8")
+    pos += name_len
+    pages = []
+    for _ in range(page_count):
+        (size,) = _PAGE.unpack_from(frame, pos)
+        pos += _PAGE.size
+        pages.append(frame[pos:pos + size])
+        pos += size
+    return CaptureRecord(ts, source, pages)
+
+
+def _valid_end(f: Any) -> int:
+    # Walks block headers only (seeking over the payloads) to find where the last whole block ends.
+    size = f.seek(0, os.SEEK_END)
+    pos = len(MAGIC)
+    while pos + _BLOCK.size <= size:
+        f.seek(pos)
+        (length,) = _BLOCK.unpack(f.read(_BLOCK.size))
+        if pos + _BLOCK.size + length > size:
+            break
+        pos += _BLOCK.size + length
+    return pos
+
+
+class CaptureWriter:
+    # Append-only recorder for raw poll responses; compression and writes run off the event loop.
+    def __init__(self, path: str, compresslevel: int = 6) -> None:
+        self.path = path
+        self.compresslevel = compresslevel
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        self._file = open(path, "a+b")
+        self._file.seek(0)
+        head = self._file.read(len(MAGIC))
+        if not head:
+            self._file.write(MAGIC)
+        elif head != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a capture file")
+        else:
+            end = _valid_end(self._file)
+            if end < self._file.seek(0, os.SEEK_END):
+                logger.warning("Capture %s: dropping a torn block at offset %d", path, end)
+                self._file.truncate(end)
+        self._file.flush()
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def _write(self, record: CaptureRecord) -> None:
+        block = zlib.compress(_encode(record), self.compresslevel)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(_BLOCK.pack(len(block)) + block)
+            self._file.flush()
+            self.records += 1
+
+    async def record(self, source: str, pages: List[bytes], ts: Optional[float] = None) -> None:
+        record = CaptureRecord(time.time() if ts is None else ts, source, pages)
+        await asyncio.to_thread(self._write, record)
+
+    def _close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+
+def iter_capture(path: str) -> Iterator[CaptureRecord]:
+    # Streams one block at a time, so a capture of any size is read in constant memory.
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a capture file")
+        while True:
+            header = f.read(_BLOCK.size)
+            if not header:
+                return
+            block = f.read(_BLOCK.unpack(header)[0]) if len(header) == _BLOCK.size else b""
+            try:
+                yield _decode(zlib.decompress(block))
+            except (zlib.error, struct.error) as e:
+                logger.warning("Capture %s ends with a damaged block, stopping: %s", path, e)
+                return
+
+
+Submit = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+async def replay_capture(path: str, sources: Dict[str, Any], submit: Submit) -> Dict[str, float]:
+    # Feeds each recorded response through its source's extraction and filters, then hands the
+    # snapshots to `submit` exactly as the scheduler would, as fast as the pipeline accepts them.
+    frames = 0
+    skipped = 0
+    events_total = 0
+    first_ts: Optional[float] = None
+    last_ts: Optional[float] = None
+    it = iter_capture(path)
+    while True:
+        record = await asyncio.to_thread(next, it, None)
+        if record is None:
+            break
+        frames += 1
+        first_ts = record.ts if first_ts is None else first_ts
+        last_ts = record.ts
+        source = sources.get(record.source)
+        if source is None:
+            skipped += 1
+            continue
+        for poller_name, events in source.replay_pages(record.pages):
+            EVENTS_TOTAL.labels(poller_name).inc(len(events))
+            events_total += len(events)
+            await submit(poller_name, events)
+    if skipped:
+        logger.warning("Replay: %d frame(s) from sources not in the config were skipped", skipped)
+    return {
+        "frames": frames,
+        "events": events_total,
+        "span_seconds": (last_ts - first_ts) if first_ts is not None and last_ts is not None else 0.0,
+    }
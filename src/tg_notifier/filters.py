@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Event = Dict[str, Any]
+Check = Callable[[Any], bool]
+
+
+def _to_number(value: Any) -> float:
+    # Same coercion as the original where_gte: missing/falsy -> 0, unparseable -> NaN (never passes).
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _numeric_check(low: Optional[float], high: Optional[float]) -> Check:
+    def check(value: Any) -> bool:
+        v = _to_number(value)
+        return (low is None or v >= low) and (high is None or v <= high)
+    return check
+
+
+def _membership_check(allowed: List[Any]) -> Check:
+    try:
+        allowed_set = frozenset(allowed)
+    except TypeError:
+        return lambda v: v in allowed
+
+    def check(value: Any) -> bool:
+        try:
+            return value in allowed_set
+        except TypeError:
+            return value in allowed
+    return check
+
+
+# post_process predicates compiled once; call with a list of events to filter it.
+# Keys: where (equality), where_in, where_gte, where_lte, where_range ([min, max], either
+# end may be null) and where_regex. Bounds on one field are merged into a single range check.
+class CompiledFilter:
+    def __init__(self, opt: Optional[Dict[str, Any]] = None) -> None:
+        opt = opt or {}
+        checks: List[Tuple[str, Check]] = []
+        self.bounds: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+
+        for field, expected in (opt.get("where") or {}).items():
+            checks.append((field, lambda v, expected=expected: v == expected))
+        for field, allowed in (opt.get("where_in") or {}).items():
+            checks.append((field, _membership_check(list(allowed))))
+        for field, pattern in (opt.get("where_regex") or {}).items():
+            rx = re.compile(pattern)
+            checks.append((field, lambda v, rx=rx: v is not None and rx.search(str(v)) is not None))
+
+        for key, side in (("where_gte", 0), ("where_lte", 1)):
+            for field, bound in (opt.get(key) or {}).items():
+                low, high = self.bounds.get(field, (None, None))
+                if side == 0:
+                    low = float(bound) if low is None else max(low, float(bound))
+                else:
+                    high = float(bound) if high is None else min(high, float(bound))
+                self.bounds[field] = (low, high)
+        for field, bounds in (opt.get("where_range") or {}).items():
+            lo, hi = (list(bounds) + [None, None])[:2]
+            low, high = self.bounds.get(field, (None, None))
+            if lo is not None:
+                low = float(lo) if low is None else max(low, float(lo))
+            if hi is not None:
+                high = float(hi) if high is None else min(high, float(hi))
+            self.bounds[field] = (low, high)
+
+        self.checks: Tuple[Tuple[str, Check], ...] = tuple(checks) + tuple(
+            (field, _numeric_check(low, high)) for field, (low, high) in self.bounds.items()
+        )
+
+    def predicate(self, event: Event) -> bool:
+        for field, check in self.checks:
+            if not check(event.get(field)):
+                return False
+        return True
+
+    def __call__(self, events: List[Event]) -> List[Event]:
+        if not self.checks or not events:
+            return events
+        predicate = self.predicate
+        return [e for e in events if predicate(e)]
+
+
+def compile_filter(opt: Optional[Dict[str, Any]]) -> CompiledFilter:
+    return CompiledFilter(opt)
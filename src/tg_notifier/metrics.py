@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+DEFAULT_METRICS: Dict[str, Any] = {
+    "enabled": False,
+    "host": "127.0.0.1",
+    "port": 9464,
+    "log_interval_seconds": 0,
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th observation; good enough for log summaries.
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[LabelValues, Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self._new_child()
+        return child
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str], buckets: Tuple[float, ...]) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, child in self.children.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += n
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(child.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, values)} {_fmt(child.value)}"
+            for values, child in self.children.items()
+        ]
+
+
+class Gauge(_Family):
+    # Read at scrape time from a callback returning {label values: value}, so hot paths pay nothing.
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Iterable[str], read: Callable[[], Dict[LabelValues, float]]
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.read()
+        except Exception as e:
+            logger.debug("Gauge %s read failed: %s", self.name, e)
+            return []
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}" for key, v in values.items()]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.families: Dict[str, _Family] = {}
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = Histogram(name, help_text, labelnames, buckets)
+        return family  # type: ignore[return-value]
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = Counter(name, help_text, labelnames)
+        return family  # type: ignore[return-value]
+
+    def gauge(
+        self, name: str, help_text: str, labelnames: Iterable[str], read: Callable[[], Dict[LabelValues, float]]
+    ) -> Gauge:
+        # Re-registering replaces the callback, so a restarted component reports its own state.
+        family = self.families[name] = Gauge(name, help_text, labelnames, read)
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.samples())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        parts = []
+        for family in self.families.values():
+            if isinstance(family, Histogram):
+                for values, child in family.children.items():
+                    if child.count:
+                        label = "/".join(values)
+                        parts.append(
+                            f"{family.name}[{label}] n={child.count} avg={child.sum / child.count * 1000:.1f}ms "
+                            f"p99<={child.quantile(0.99) * 1000:.1f}ms"
+                        )
+            elif isinstance(family, Counter):
+                for values, child in family.children.items():
+                    parts.append(f"{family.name}[{'/'.join(values)}]={_fmt(child.value)}")
+        return "; ".join(parts)
+
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram("tg_fetch_seconds", "HTTP fetch latency per poll source", ("source",))
+PARSE_SECONDS = REGISTRY.histogram("tg_parse_seconds", "JSON parse time per poll source", ("source",))
+EXTRACT_SECONDS = REGISTRY.histogram("tg_extract_seconds", "Extraction and filter time per poller", ("poller",))
+RENDER_SECONDS = REGISTRY.histogram("tg_render_seconds", "Template render time per poller", ("poller",))
+SEND_SECONDS = REGISTRY.histogram("tg_send_seconds", "Telegram API call latency per notifier", ("notifier", "method"))
+STATE_WRITE_SECONDS = REGISTRY.histogram("tg_state_write_seconds", "State store write time", ("kind",))
+EVENTS_TOTAL = REGISTRY.counter("tg_events_total", "Events delivered by pollers after filtering", ("poller",))
+ALERTS_TOTAL = REGISTRY.counter("tg_alerts_total", "Alerts produced by tracking strategies", ("poller",))
+POLL_ERRORS_TOTAL = REGISTRY.counter("tg_poll_errors_total", "Failed polls by kind", ("poller", "kind"))
+TELEGRAM_RESPONSES_TOTAL = REGISTRY.counter(
+    "tg_telegram_responses_total", "Telegram API responses by outcome", ("notifier", "outcome")
+)
+
+
+class MetricsServer:
+    # Minimal HTTP endpoint serving REGISTRY in Prometheus text format on GET /metrics,
+    # plus an optional periodic summary in the log.
+    def __init__(self, config: Optional[Dict[str, Any]] = None, registry: Registry = REGISTRY) -> None:
+        opts = {**DEFAULT_METRICS, **(config or {})}
+        self.enabled = bool(opts["enabled"])
+        self.host = opts["host"]
+        self.port = int(opts["port"])
+        self.log_interval_seconds = float(opts["log_interval_seconds"] or 0)
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._log_task: Optional[asyncio.Task] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _log_summary(self) -> None:
+        while True:
+            await asyncio.sleep(self.log_interval_seconds)
+            logger.info("Metrics: %s", self.registry.summary())
+
+    async def start(self) -> None:
+        if self.enabled:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info("Metrics endpoint on http://%s:%d/metrics", self.host, self.port)
+        if self.log_interval_seconds > 0:
+            self._log_task = asyncio.create_task(self._log_summary())
+
+    async def close(self) -> None:
+        if self._log_task is not None:
+            self._log_task.cancel()
+            await asyncio.gather(self._log_task, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
@@ -1,3 +1,5 @@
+from .ratelimit import TokenBucket
+from .sink import SinkNotifier
 from .telegram import TelegramNotifier
 
-__all__ = ["TelegramNotifier"] 
\ No newline at end of file
+__all__ = ["SinkNotifier", "TelegramNotifier", "TokenBucket"]
\ No newline at end of file
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterable, Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+async def acquire(buckets: Iterable[TokenBucket]) -> None:
+    buckets = list(buckets)
+    while True:
+        now = time.monotonic()
+        wait = max((b.delay(now) for b in buckets), default=0.0)
+        if wait <= 0:
+            # No await between the check and the consume, so this is atomic on the loop.
+            for b in buckets:
+                b.consume()
+            return
+        await asyncio.sleep(wait)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, TextIO
+
+from ..utils import dump_json
+
+logger = logging.getLogger(__name__)
+
+
+class SinkNotifier:
+    # Stand-in for a real notifier (replay, backtests): accepts every message instantly and
+    # optionally appends it as a JSON line to `path`.
+    def __init__(self, name: str = "sink", path: Optional[str] = None) -> None:
+        self.name = name
+        self.path = path
+        self.queue_depth = 0
+        self.stats: Dict[str, float] = {"sent": 0}
+        self._file: Optional[TextIO] = open(path, "a", encoding="utf-8") if path else None
+        self._lock = asyncio.Lock()
+
+    async def send_message(
+        self,
+        chat_id: str | int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: bool = True,
+    ) -> Dict[str, Any]:
+        self.stats["sent"] += 1
+        message_id = int(self.stats["sent"])
+        await self._record({"ts": time.time(), "notifier": self.name, "chat_id": chat_id, "text": text})
+        return {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat_id}}}
+
+    async def edit_message_text(
+        self,
+        chat_id: str | int,
+        message_id: int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: bool = True,
+    ) -> Dict[str, Any]:
+        self.stats["edited"] = self.stats.get("edited", 0) + 1
+        await self._record(
+            {"ts": time.time(), "notifier": self.name, "chat_id": chat_id, "edit": message_id, "text": text}
+        )
+        return {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat_id}}}
+
+    async def pin_chat_message(self, chat_id: str | int, message_id: int) -> Dict[str, Any]:
+        return {"ok": True, "result": True}
+
+    async def _record(self, entry: Dict[str, Any]) -> None:
+        if self._file is not None:
+            line = dump_json(entry)
+            async with self._lock:
+                await asyncio.to_thread(self._write, line)
+
+    def _write(self, line: str) -> None:
+        if self._file is not None:
+            self._file.write(line + "\n")
+
+    async def close(self) -> None:
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
@@ -1,28 +1,220 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
+from ..metrics import SEND_SECONDS, TELEGRAM_RESPONSES_TOTAL
+from ..transport import TransportManager
+from .ratelimit import TokenBucket, acquire
+
 logger = logging.getLogger(__name__)
 
+# Bot API limits: ~30 msg/s per bot, 1 msg/s per chat, 20 msg/min per group or channel.
+DEFAULT_RATE_LIMITS: Dict[str, float] = {
+    "global_per_second": 30,
+    "chat_per_second": 1,
+    "group_per_minute": 20,
+}
+
+API_BASE_URL = "https://api.telegram.org"
+# sendMessage text limit, counted by Telegram in UTF-16 code units.
+MAX_MESSAGE_LENGTH = 4096
+
+
+def message_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _hard_split(line: str, limit: int) -> List[str]:
+    pieces: List[str] = []
+    cur: List[str] = []
+    size = 0
+    for ch in line:
+        n = message_length(ch)
+        if size + n > limit:
+            pieces.append("".join(cur))
+            cur, size = [], 0
+        cur.append(ch)
+        size += n
+    if cur:
+        pieces.append("".join(cur))
+    return pieces
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    # Split on line boundaries so Markdown/HTML entities, which never span lines in our
+    # templates, stay intact; only a single over-long line is cut mid-line.
+    if message_length(text) <= limit:
+        return [text]
+    chunks: List[str] = []
+    cur = ""
+    for line in text.split("\n"):
+        for piece in ([line] if message_length(line) <= limit else _hard_split(line, limit)):
+            candidate = f"{cur}\n{piece}" if cur else piece
+            if cur and message_length(candidate) > limit:
+                chunks.append(cur)
+                cur = piece
+            else:
+                cur = candidate
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def pack_messages(texts: List[str], separator: str = "\n\n", limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    # Keep each rendered event whole where possible; events are only split when one alone exceeds the limit.
+    chunks: List[str] = []
+    cur = ""
+    for text in texts:
+        for piece in split_message(text, limit):
+            candidate = f"{cur}{separator}{piece}" if cur else piece
+            if cur and message_length(candidate) > limit:
+                chunks.append(cur)
+                cur = piece
+            else:
+                cur = candidate
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _is_group_chat(chat_id: str | int) -> bool:
+    # Groups, supergroups and channels have negative ids; "@channel" usernames are channels too.
+    text = str(chat_id)
+    return text.startswith("-") or text.startswith("@")
+
 
 class TelegramNotifier:
-    def __init__(self, token: str, default_parse_mode: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        token: str,
+        default_parse_mode: Optional[str] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_retries: int = 5,
+        max_backoff_seconds: float = 30,
+        transport: Optional[TransportManager] = None,
+        name: str = "telegram",
+        api_base_url: Optional[str] = None,
+    ) -> None:
+        self.name = name
         self.token = token
+        self.api_base_url = (api_base_url or API_BASE_URL).rstrip("/")
         self.default_parse_mode = default_parse_mode
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.max_retries = max(0, max_retries)
+        self.max_backoff_seconds = max_backoff_seconds
+        self.transport = transport
         self._client: Optional[httpx.AsyncClient] = None
+        self._global_bucket = TokenBucket(float(self.rate_limits["global_per_second"]))
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._group_buckets: Dict[str, TokenBucket] = {}
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        self.queue_depth = 0
+        self.stats: Dict[str, float] = {
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "rate_limited": 0,
+            "latency_total_seconds": 0.0,
+            "latency_max_seconds": 0.0,
+        }
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=15)
+            if self.transport is not None:
+                self._client = self.transport.client_for(self.api_base_url)
+            else:
+                self._client = httpx.AsyncClient(timeout=15)
         return self._client
 
     async def close(self) -> None:
-        if self._client is not None:
+        if self._client is not None and self.transport is None:
             await self._client.aclose()
-            self._client = None
+        self._client = None
+
+    def _buckets_for(self, chat_id: str | int) -> List[TokenBucket]:
+        key = str(chat_id)
+        if key not in self._chat_buckets:
+            self._chat_buckets[key] = TokenBucket(float(self.rate_limits["chat_per_second"]), 1)
+        buckets = [self._global_bucket, self._chat_buckets[key]]
+        if _is_group_chat(chat_id):
+            if key not in self._group_buckets:
+                per_minute = float(self.rate_limits["group_per_minute"])
+                self._group_buckets[key] = TokenBucket(per_minute / 60, per_minute)
+            buckets.append(self._group_buckets[key])
+        return buckets
+
+    def _chat_lock(self, chat_id: str | int) -> asyncio.Lock:
+        key = str(chat_id)
+        if key not in self._chat_locks:
+            self._chat_locks[key] = asyncio.Lock()
+        return self._chat_locks[key]
+
+    def _record_latency(self, method: str, started: float) -> None:
+        elapsed = time.monotonic() - started
+        SEND_SECONDS.labels(self.name, method).observe(elapsed)
+        self.stats["latency_total_seconds"] += elapsed
+        self.stats["latency_max_seconds"] = max(self.stats["latency_max_seconds"], elapsed)
+
+    async def _post(self, method: str, payload: Dict[str, Any]) -> Tuple[Optional[httpx.Response], Dict[str, Any]]:
+        url = f"{self.api_base_url}/bot{self.token}/{method}"
+        client = await self._get_client()
+        try:
+            resp = await client.post(url, json=payload)
+        except httpx.HTTPError as e:
+            return None, {"ok": False, "description": str(e)}
+        try:
+            data = resp.json()
+        except Exception:
+            data = {"ok": False, "status_code": resp.status_code, "text": resp.text}
+        return resp, data
+
+    async def _call(self, method: str, chat_id: str | int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        self.queue_depth += 1
+        try:
+            # Per-chat lock keeps messages to one chat in order while they wait for budget or retry.
+            async with self._chat_lock(chat_id):
+                buckets = self._buckets_for(chat_id)
+                attempt = 0
+                while True:
+                    await acquire(buckets)
+                    resp, data = await self._post(method, payload)
+                    if resp is not None and resp.is_success and data.get("ok", False):
+                        self.stats["sent"] += 1
+                        TELEGRAM_RESPONSES_TOTAL.labels(self.name, "ok").inc()
+                        return data
+                    status = resp.status_code if resp is not None else None
+                    outcome = "rate_limited" if status == 429 else "transport_error" if status is None else "error"
+                    TELEGRAM_RESPONSES_TOTAL.labels(self.name, outcome).inc()
+                    retryable = status is None or status == 429 or status >= 500
+                    if not retryable or attempt >= self.max_retries:
+                        self.stats["failed"] += 1
+                        logger.warning("Telegram %s failed: status=%s body=%s", method, status, data)
+                        return data
+                    attempt += 1
+                    self.stats["retried"] += 1
+                    retry_after = (data.get("parameters") or {}).get("retry_after")
+                    if status == 429 and retry_after:
+                        self.stats["rate_limited"] += 1
+                        delay = float(retry_after)
+                        for b in buckets[1:]:
+                            b.pause(delay)
+                    else:
+                        delay = min(self.max_backoff_seconds, 2 ** (attempt - 1))
+                    logger.info(
+                        "Telegram %s retry %d/%d for chat %s in %.1fs (status=%s)",
+                        method, attempt, self.max_retries, chat_id, delay, status,
+                    )
+                    await asyncio.sleep(delay)
+        finally:
+            self.queue_depth -= 1
+            self._record_latency(method, started)
+            logger.debug("Telegram %s latency=%.3fs queue_depth=%d", method, time.monotonic() - started, self.queue_depth)
 
     async def send_message(
         self,
@@ -31,7 +223,6 @@ class TelegramNotifier:
         parse_mode: Optional[str] = None,
         disable_web_page_preview: bool = True,
     ) -> Dict[str, Any]:
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
         payload: Dict[str, Any] = {
             "chat_id": chat_id,
             "text": text,
@@ -40,12 +231,28 @@ class TelegramNotifier:
         mode = parse_mode or self.default_parse_mode
         if mode:
             payload["parse_mode"] = mode
-        client = await self._get_client()
-        resp = await client.post(url, json=payload)
-        try:
-            data = resp.json()
-        except Exception:
-            data = {"ok": False, "status_code": resp.status_code, "text": resp.text}
-        if not resp.is_success or not data.get("ok", False):
-            logger.warning("Telegram sendMessage failed: status=%s body=%s", resp.status_code, data)
-        return data 
\ No newline at end of file
+        return await self._call("sendMessage", chat_id, payload)
+
+    async def edit_message_text(
+        self,
+        chat_id: str | int,
+        message_id: int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: bool = True,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": text,
+            "disable_web_page_preview": disable_web_page_preview,
+        }
+        mode = parse_mode or self.default_parse_mode
+        if mode:
+            payload["parse_mode"] = mode
+        return await self._call("editMessageText", chat_id, payload)
+
+    async def pin_chat_message(self, chat_id: str | int, message_id: int) -> Dict[str, Any]:
+        payload = {"chat_id": chat_id, "message_id": message_id, "disable_notification": True}
+        return await self._call("pinChatMessage", chat_id, payload)
+
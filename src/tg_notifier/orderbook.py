@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class OrderBookDiff(NamedTuple):
+    added: List[Dict[str, Any]]
+    removed: List[Dict[str, Any]]
+    changed: List[Dict[str, Any]]
+
+
+def to_price(value: Any) -> float:
+    # Unparseable prices sort last instead of failing the whole cycle.
+    try:
+        return float(value if value is not None else 0)
+    except (TypeError, ValueError):
+        return math.inf
+
+
+class PartialSnapshot(list):
+    # Events from a scan that stopped early on data sorted by price: complete only up to the
+    # last price received (down to it when `descending`); later offers were never fetched.
+    def __init__(self, events: Iterable[Dict[str, Any]] = (), descending: bool = False) -> None:
+        super().__init__(events)
+        self.descending = descending
+
+
+def _comparable(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in event.items() if k != "__raw__"}
+
+
+class OrderBook:
+    def __init__(self, key: str = "price", id_key: str = "__id__") -> None:
+        self.key = key
+        self.id_key = id_key
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._prices: Dict[str, float] = {}
+        self._sorted: List[Tuple[float, str]] = []
+        # Price range the last snapshot saw in full: (bound, descending), or None for all of it.
+        self._covered: Optional[Tuple[float, bool]] = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: object) -> bool:
+        return order_id in self._orders
+
+    def id_of(self, event: Dict[str, Any]) -> str:
+        order_id = event.get(self.id_key) or event.get("id")
+        if order_id is not None:
+            return str(order_id)
+        # Without an id_path an offer is known by its terms: the fingerprint, or else its content.
+        if event.get("__fp__"):
+            return f"fp:{event['__fp__']}"
+        content = json.dumps(_comparable(event), sort_keys=True, default=str).encode("utf-8")
+        return "content:" + hashlib.blake2b(content, digest_size=12).hexdigest()
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self._orders.get(order_id)
+
+    def price_of(self, order_id: str) -> Optional[float]:
+        return self._prices.get(order_id)
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        return self._orders[self._sorted[0][1]] if self._sorted else None
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        return [self._orders[order_id] for _, order_id in self._sorted[:n]]
+
+    def covers(self, price: float) -> bool:
+        # Whether an offer at `price` missing from the last snapshot is really gone.
+        if self._covered is None:
+            return True
+        bound, descending = self._covered
+        return price > bound if descending else price < bound
+
+    def _insert(self, order_id: str, event: Dict[str, Any]) -> None:
+        price = to_price(event.get(self.key))
+        self._orders[order_id] = event
+        self._prices[order_id] = price
+        insort(self._sorted, (price, order_id))
+
+    def _remove(self, order_id: str) -> Dict[str, Any]:
+        entry = (self._prices.pop(order_id), order_id)
+        i = bisect_left(self._sorted, entry)
+        if i < len(self._sorted) and self._sorted[i] == entry:
+            del self._sorted[i]
+        return self._orders.pop(order_id)
+
+    def apply_snapshot(self, events: Iterable[Dict[str, Any]]) -> OrderBookDiff:
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for event in events:
+            incoming[self.id_of(event)] = event
+        self._covered = None
+        if isinstance(events, PartialSnapshot):
+            # Ties with the last price may sit on the next page, so the bound itself is not covered.
+            prices = [to_price(event.get(self.key)) for event in incoming.values()]
+            if events.descending:
+                self._covered = (min(prices, default=math.inf), True)
+            else:
+                self._covered = (max(prices, default=-math.inf), False)
+        removed_ids = [
+            order_id for order_id in self._orders if order_id not in incoming and self.covers(self._prices[order_id])
+        ]
+        added: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        for order_id, event in incoming.items():
+            previous = self._orders.get(order_id)
+            if previous is None:
+                added.append(event)
+            elif _comparable(previous) != _comparable(event):
+                changed.append(event)
+            else:
+                # Same terms: keep the index entry, but hold the fresh object.
+                self._orders[order_id] = event
+        removed = [self._orders[order_id] for order_id in removed_ids]
+        touched = len(removed_ids) + len(added) + len(changed)
+        if touched > len(self._sorted) // 4:
+            # Large churn: one O(n log n) rebuild beats many O(n) list shifts.
+            for order_id in removed_ids:
+                del self._orders[order_id]
+                del self._prices[order_id]
+            for event in added + changed:
+                order_id = self.id_of(event)
+                self._orders[order_id] = event
+                self._prices[order_id] = to_price(event.get(self.key))
+            self._sorted = sorted((price, order_id) for order_id, price in self._prices.items())
+        else:
+            for order_id in removed_ids:
+                self._remove(order_id)
+            for event in changed:
+                order_id = self.id_of(event)
+                self._remove(order_id)
+                self._insert(order_id, event)
+            for event in added:
+                self._insert(self.id_of(event), event)
+        return OrderBookDiff(added, removed, changed)
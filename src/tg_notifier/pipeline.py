@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from .metrics import ALERTS_TOTAL, RENDER_SECONDS
+from .routing.router import OutboundMessage, Router
+from .state.outbox import Outbox
+from .tracking import TrackingStrategy
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+POLICIES = ("block", "drop_oldest", "drop_newest", "merge")
+
+DEFAULT_PIPELINE: Dict[str, Any] = {
+    "snapshot_overflow": "merge",
+    "alert_queue_size": 1000,
+    "alert_overflow": "block",
+    "send_queue_size": 1000,
+    "send_overflow": "block",
+    "send_concurrency": 4,
+    "send_batch_size": 20,
+    "max_send_attempts": 10,
+    "retry_backoff_seconds": 5,
+    "max_retry_backoff_seconds": 300,
+}
+
+
+def send_outcome(result: Any) -> str:
+    # "sent", "retry" (transient: transport, 429, 5xx) or "drop" (Telegram rejected the message).
+    if isinstance(result, BaseException):
+        return "retry"
+    if isinstance(result, dict) and not result.get("ok", True):
+        code = result.get("error_code") or result.get("status_code")
+        if isinstance(code, int) and 400 <= code < 500 and code != 429:
+            return "drop"
+        return "retry"
+    return "sent"
+
+
+class StageQueue:
+    # Bounded FIFO between two pipeline stages. When full, put() applies the policy:
+    # block (backpressure on the producer), drop_oldest, drop_newest, or merge, which
+    # replaces a queued item with the same key in place (and otherwise blocks).
+    def __init__(self, name: str, maxsize: int, policy: str = "block") -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy for {name}: {policy}")
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.dropped = 0
+        self.merged = 0
+        self._items: Deque[List[Any]] = deque()
+        self._cond = asyncio.Condition()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    async def put(self, item: Any, key: Optional[Hashable] = None) -> bool:
+        async with self._cond:
+            if self.policy == "merge" and key is not None:
+                for entry in self._items:
+                    if entry[0] == key:
+                        entry[1] = item
+                        self.merged += 1
+                        return True
+            while len(self._items) >= self.maxsize:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    logger.warning("Queue %s full, dropping newest item", self.name)
+                    return False
+                if self.policy == "drop_oldest":
+                    self._items.popleft()
+                    self._task_done()
+                    self.dropped += 1
+                    logger.warning("Queue %s full, dropping oldest item", self.name)
+                    break
+                await self._cond.wait()
+            self._items.append([key, item])
+            self._unfinished += 1
+            self._finished.clear()
+            self._cond.notify_all()
+            return True
+
+    async def get(self) -> Any:
+        async with self._cond:
+            while not self._items:
+                await self._cond.wait()
+            _, item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    async def get_batch(self, max_items: int) -> List[Any]:
+        # Waits for one item, then takes whatever else is already queued (call task_done per item).
+        async with self._cond:
+            while not self._items:
+                await self._cond.wait()
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft()[1])
+            self._cond.notify_all()
+            return batch
+
+    def _task_done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._finished.set()
+
+    def task_done(self) -> None:
+        self._task_done()
+
+    async def join(self) -> None:
+        await self._finished.wait()
+
+
+class Pipeline:
+    # fetch (scheduler + poller) -> snapshots -> track -> alerts -> render -> messages -> send.
+    # Each hop is a StageQueue, so a slow Telegram call never delays the next poll and a slow
+    # poll never holds back alerts already produced. Snapshots merge per poller: a newer
+    # snapshot supersedes one the tracker has not reached yet (replay uses "block" instead,
+    # so every recorded snapshot is tracked).
+    # With an outbox, rendered messages are committed to disk together with the tracking
+    # change before they are queued for sending, and acknowledged once sent.
+    def __init__(
+        self,
+        router: Router,
+        state: Any,
+        strategies: Dict[str, TrackingStrategy],
+        config: Optional[Dict[str, Any]] = None,
+        outbox: Optional[Outbox] = None,
+    ) -> None:
+        opts = {**DEFAULT_PIPELINE, **(config or {})}
+        self.router = router
+        self.state = state
+        self.strategies = strategies
+        self.outbox = outbox
+        self.snapshots = StageQueue("snapshots", max(1, len(strategies)), opts["snapshot_overflow"])
+        self.alerts = StageQueue("alerts", opts["alert_queue_size"], opts["alert_overflow"])
+        self.messages = StageQueue("messages", opts["send_queue_size"], opts["send_overflow"])
+        self.send_concurrency = max(1, int(opts["send_concurrency"]))
+        self.send_batch_size = max(1, int(opts["send_batch_size"]))
+        self.max_send_attempts = max(1, int(opts["max_send_attempts"]))
+        self.retry_backoff_seconds = float(opts["retry_backoff_seconds"])
+        self.max_retry_backoff_seconds = float(opts["max_retry_backoff_seconds"])
+        self._attempts: Dict[str, int] = {}
+        self._queued: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def set_strategy(self, poller_name: str, strategy: Optional[TrackingStrategy]) -> None:
+        # Config reload: None removes the poller. The snapshot queue holds one slot per poller.
+        if strategy is None:
+            self.strategies.pop(poller_name, None)
+        else:
+            self.strategies[poller_name] = strategy
+        self.snapshots.maxsize = max(1, len(self.strategies))
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {q.name: q.qsize() for q in (self.snapshots, self.alerts, self.messages)}
+
+    async def submit(self, poller_name: str, events: List[Event]) -> None:
+        # Scheduler handler: returns as soon as the snapshot is queued.
+        await self.snapshots.put((poller_name, events), key=poller_name)
+
+    async def push(self, poller_name: str, events: List[Event]) -> None:
+        # Handler for pushed deltas: batches never merge (each carries different events), so a
+        # full snapshot queue applies backpressure to the sender instead.
+        await self.snapshots.put((poller_name, events))
+
+    async def _drop_duplicates(self, poller_name: str, alerts: List[Event]) -> List[Event]:
+        # Alerts carrying a content fingerprint (post_process.dedupe_key_fields) are sent once per
+        # window, however many IDs the same terms get re-listed under.
+        fingerprints = {a["__fp__"] for a in alerts if a.get("__fp__")}
+        if not fingerprints:
+            return alerts
+        seen = await self.state.seen_fingerprints(poller_name, fingerprints)
+        fresh: List[Event] = []
+        for alert in alerts:
+            fp = alert.get("__fp__")
+            if fp:
+                if fp in seen:
+                    continue
+                seen.add(fp)
+            fresh.append(alert)
+        if len(fresh) < len(alerts):
+            logger.info("Poller %s: %d duplicate alert(s) suppressed", poller_name, len(alerts) - len(fresh))
+        await self.state.mark_fingerprints(poller_name, {a["__fp__"] for a in fresh if a.get("__fp__")})
+        return fresh
+
+    async def _track_stage(self) -> None:
+        while True:
+            poller_name, events = await self.snapshots.get()
+            try:
+                strategy = self.strategies.get(poller_name)
+                if strategy is None:
+                    # The poller was removed by a config reload after this snapshot was queued.
+                    continue
+                result = await strategy.update(events, self.state)
+                alerts = await self._drop_duplicates(poller_name, result.alerts) if result.alerts else []
+                if alerts:
+                    ALERTS_TOTAL.labels(poller_name).inc(len(alerts))
+                if alerts or result.tracking is not None:
+                    await self.alerts.put((poller_name, alerts, result.tracking))
+            except Exception as e:
+                logger.exception("Poller %s tracking error: %s", poller_name, e)
+            finally:
+                self.snapshots.task_done()
+
+    async def _enqueue(self, key: Optional[str], message: OutboundMessage) -> None:
+        if key is not None:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        await self.messages.put((key, message))
+
+    async def _render_stage(self) -> None:
+        while True:
+            poller_name, alerts, tracking = await self.alerts.get()
+            try:
+                started = time.perf_counter()
+                messages = self.router.render_messages(poller_name, alerts) if alerts else []
+                RENDER_SECONDS.labels(poller_name).observe(time.perf_counter() - started)
+                if self.outbox is not None:
+                    entries = await self.outbox.commit(poller_name, tracking, messages)
+                else:
+                    if tracking is not None:
+                        await self.state.save_tracking(poller_name, tracking)
+                    entries = [(None, m) for m in messages]
+                for key, message in entries:
+                    await self._enqueue(key, message)
+            except Exception as e:
+                logger.exception("Poller %s render error: %s", poller_name, e)
+            finally:
+                self.alerts.task_done()
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.max_retry_backoff_seconds, self.retry_backoff_seconds * 2 ** (attempts - 1))
+
+    async def _retry_later(self, key: str, message: OutboundMessage, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._enqueue(key, message)
+
+    async def _send_stage(self) -> None:
+        # The notifier's per-chat lock is FIFO and taken before its first await,
+        # so messages to one chat still go out in the order they were rendered.
+        while True:
+            batch = await self.messages.get_batch(self.send_batch_size)
+            try:
+                results = await asyncio.gather(*[self.router.send(m) for _, m in batch], return_exceptions=True)
+                acked: List[str] = []
+                for (key, message), result in zip(batch, results):
+                    outcome = send_outcome(result)
+                    if outcome != "sent":
+                        logger.error("Router deliver error for %s: %s", message.poller_name, result)
+                    if key is None:
+                        continue
+                    self._queued.discard(key)
+                    attempts = self._attempts.pop(key, 0) + 1
+                    if outcome == "retry" and attempts < self.max_send_attempts:
+                        self._attempts[key] = attempts
+                        self._spawn(self._retry_later(key, message, self._retry_delay(attempts)))
+                        continue
+                    if outcome != "sent":
+                        logger.error("Outbox: giving up on message %s after %d attempt(s)", key, attempts)
+                    acked.append(key)
+                if self.outbox is not None and acked:
+                    await self.outbox.ack(acked)
+            except Exception as e:
+                logger.exception("Send stage error: %s", e)
+            finally:
+                for _ in batch:
+                    self.messages.task_done()
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def replay(self) -> None:
+        # Requeue what a previous run committed but never got acknowledged.
+        if self.outbox is None:
+            return
+        for record in await self.outbox.load():
+            message = self.router.restore_message(record)
+            if message is None:
+                await self.outbox.ack([record["id"]])
+                continue
+            await self._enqueue(record["id"], message)
+
+    def start(self) -> None:
+        self._spawn(self._track_stage())
+        self._spawn(self._render_stage())
+        for _ in range(self.send_concurrency):
+            self._spawn(self._send_stage())
+
+    async def join(self) -> None:
+        # Upstream stages finish an item only after handing its output downstream.
+        # Messages waiting out a retry delay stay in the outbox for the next run.
+        for queue in (self.snapshots, self.alerts, self.messages):
+            await queue.join()
+
+    async def close(self) -> None:
+        tasks: Tuple[asyncio.Task, ...] = tuple(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
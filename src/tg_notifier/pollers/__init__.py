@@ -1,3 +1,14 @@
-from .http_json import HTTPJSONPoller
+from .extract import EventExtractor
+from .http_json import HTTPJSONPoller, HTTPJSONSource, request_signature
+from .push import PushPoller, WebhookPoller, WebhookServer, WebSocketPoller
 
-__all__ = ["HTTPJSONPoller"] 
\ No newline at end of file
+__all__ = [
+    "EventExtractor",
+    "HTTPJSONPoller",
+    "HTTPJSONSource",
+    "PushPoller",
+    "WebSocketPoller",
+    "WebhookPoller",
+    "WebhookServer",
+    "request_signature",
+]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional
+
+from ..filters import CompiledFilter
+from ..metrics import EXTRACT_SECONDS
+from ..utils import compile_fingerprint, compile_path
+
+
+class EventExtractor:
+    # Turns upstream items into events from a poller's `fields`/`id_path`/`updated_at_path`
+    # config and applies its post_process filter. Shared by polled and pushed sources.
+    def __init__(
+        self,
+        name: str,
+        id_path: Optional[str] = None,
+        updated_at_path: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        keep_raw: bool = False,
+        event_filter: Optional[CompiledFilter] = None,
+        dedupe_key_fields: Optional[List[str]] = None,
+    ) -> None:
+        self.name = name
+        self.id_path = id_path
+        self.updated_at_path = updated_at_path
+        self.fields = fields or {}
+        self.keep_raw = keep_raw
+        self.event_filter = event_filter
+        self._field_getters = tuple((out_key, compile_path(path)) for out_key, path in self.fields.items())
+        self._id_getter = compile_path(id_path) if id_path else None
+        self._updated_at_getter = compile_path(updated_at_path) if updated_at_path else None
+        # Content fingerprint over extracted fields, so a re-listing with the same terms is recognizable.
+        self._fingerprint = compile_fingerprint(dedupe_key_fields) if dedupe_key_fields else None
+
+    def _extract_event(self, item: Any) -> Dict[str, Any]:
+        event = {out_key: getter(item) for out_key, getter in self._field_getters}
+        if self._id_getter is not None:
+            event["__id__"] = str(self._id_getter(item))
+        if self._updated_at_getter is not None:
+            event["__updated_at__"] = self._updated_at_getter(item)
+        if self._fingerprint is not None:
+            event["__fp__"] = self._fingerprint(event)
+        # Only pin the upstream object for the whole cycle when a template actually needs it.
+        if self.keep_raw:
+            event["__raw__"] = item
+        return event
+
+    def _extract_events(self, items: List[Any]) -> List[Dict[str, Any]]:
+        extract = self._extract_event
+        return [extract(item) for item in items]
+
+    def process_item(self, item: Any) -> Optional[Dict[str, Any]]:
+        event = self._extract_event(item)
+        if self.event_filter is not None and not self.event_filter.predicate(event):
+            return None
+        return event
+
+    def process_items(self, items: List[Any]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        events = self._extract_events(items)
+        if self.event_filter is not None:
+            events = self.event_filter(events)
+        EXTRACT_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+        return events
@@ -1,84 +1,363 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import logging
-from typing import Any, AsyncIterator, Dict, List, Optional, Set
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 import jmespath
 
-from ..utils import get_by_path
+from ..capture import CaptureWriter
+from ..filters import CompiledFilter
+from ..metrics import EVENTS_TOTAL, FETCH_SECONDS, PARSE_SECONDS
+from ..orderbook import PartialSnapshot
+from ..transport import TransportManager
+from .extract import EventExtractor
+from .jsonstream import JSONItemStream, is_streamable_path
+from .pagination import Paginator, SortedEarlyStop
 
 logger = logging.getLogger(__name__)
 
 
-class HTTPJSONPoller:
+def request_signature(request: Dict[str, Any], extract: Dict[str, Any]) -> str:
+    return json.dumps(
+        {
+            "method": (request.get("method") or "GET").upper(),
+            "url": request.get("url"),
+            "headers": request.get("headers") or {},
+            "params": request.get("params") or {},
+            "body": request.get("body"),
+            "pagination": request.get("pagination"),
+            "timeout_seconds": request.get("timeout_seconds", 10),
+            "items_jmespath": extract.get("items_jmespath"),
+            "stream": bool(extract.get("stream")),
+        },
+        sort_keys=True,
+        default=str,
+    )
+
+
+class HTTPJSONSource:
     def __init__(
         self,
-        name: str,
         request: Dict[str, Any],
         extract: Dict[str, Any],
         interval_seconds: int = 15,
-        id_path: Optional[str] = None,
-        updated_at_path: Optional[str] = None,
-        fields: Optional[Dict[str, str]] = None,
+        transport: Optional[TransportManager] = None,
+        capture: Optional[CaptureWriter] = None,
     ) -> None:
-        self.name = name
         self.request = request
         self.extract = extract
-        self.interval_seconds = max(1, interval_seconds)
-        self.id_path = id_path
-        self.updated_at_path = updated_at_path
-        self.fields = fields or {}
+        self.transport = transport
+        self.capture = capture
+        self.fresh_seconds = max(1, interval_seconds) / 2
+        self.subscribers: List[HTTPJSONPoller] = []
+        # Metrics label: the first subscriber's name.
+        self.name: Optional[str] = None
+        pagination = self.request.get("pagination")
+        self.paginator: Optional[Paginator] = Paginator(pagination) if pagination else None
+        items_expr = self.extract.get("items_jmespath")
+        # Streaming only understands plain dotted object paths; anything else is parsed in full.
+        self.stream = bool(self.extract.get("stream")) and is_streamable_path(items_expr)
+        if self.extract.get("stream") and not self.stream:
+            logger.info("items_jmespath %r is not a simple path; streaming disabled", items_expr)
         self._client: Optional[httpx.AsyncClient] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._body_hash: Optional[bytes] = None
         self._compiled_expr = jmespath.compile(self.extract.get("items_jmespath"))
+        self._lock = asyncio.Lock()
+        self._version = 0
+        self._results: Dict[int, List[Dict[str, Any]]] = {}
+        self._error: Optional[BaseException] = None
+        self._fetched_at: Optional[float] = None
+
+    def attach(self, subscriber: "HTTPJSONPoller") -> None:
+        self.subscribers.append(subscriber)
+        if self.name is None:
+            self.name = subscriber.name
+        self.fresh_seconds = min(self.fresh_seconds, max(1, subscriber.min_interval_seconds) / 2)
+        # A subscriber joining a live source (config reload) needs a full fetch to get its own results.
+        self._etag = self._last_modified = None
+        self._body_hash = None
+        self._fetched_at = None
+
+    def detach(self, subscriber: "HTTPJSONPoller") -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        self._results.pop(id(subscriber), None)
+        if self.subscribers:
+            self.fresh_seconds = min(max(1, s.min_interval_seconds) / 2 for s in self.subscribers)
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
-            timeout = self.request.get("timeout_seconds", 10)
-            self._client = httpx.AsyncClient(timeout=timeout)
+            if self.transport is not None:
+                self._client = self.transport.client_for(self.request["url"])
+            else:
+                timeout = self.request.get("timeout_seconds", 10)
+                self._client = httpx.AsyncClient(timeout=timeout)
         return self._client
 
     async def close(self) -> None:
-        if self._client is not None:
+        # Borrowed clients belong to the TransportManager, which closes them once.
+        if self._client is not None and self.transport is None:
             await self._client.aclose()
-            self._client = None
+        self._client = None
 
-    async def _fetch(self) -> List[Dict[str, Any]]:
+    def _conditional_headers(self) -> Dict[str, str]:
+        headers = dict(self.request.get("headers") or {})
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        return headers
+
+    def _items_of(self, data: Any) -> List[Any]:
+        items = self._compiled_expr.search(data) or []
+        return items if isinstance(items, list) else []
+
+    async def _refresh(self) -> None:
+        if self.paginator is not None:
+            await self._refresh_paginated(self.paginator)
+            return
         client = await self._get_client()
         method = self.request.get("method", "GET").upper()
         url = self.request["url"]
-        headers = self.request.get("headers") or {}
+        headers = self._conditional_headers()
         params = self.request.get("params") or {}
         body = self.request.get("body")
-        resp = await client.request(method, url, headers=headers, params=params, json=body)
+        timeout = self.request.get("timeout_seconds")
+        started = time.perf_counter()
+        async with client.stream(
+            method,
+            url,
+            headers=headers,
+            params=params,
+            json=body,
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        ) as resp:
+            if resp.status_code == 304:
+                return
+            resp.raise_for_status()
+            if self.stream:
+                # Download, parse and extraction interleave here, so the whole stream counts as fetch time.
+                results, body_hash, chunks = await self._consume_stream(resp)
+                FETCH_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+                if self.capture is not None and body_hash != self._body_hash:
+                    await self.capture.record(self.name or "", [b"".join(chunks)])
+            else:
+                await resp.aread()
+                parse_started = time.perf_counter()
+                FETCH_SECONDS.labels(self.name).observe(parse_started - started)
+                # Servers without validators: skip parsing when the body is byte-identical to last cycle.
+                body_hash = hashlib.blake2b(resp.content, digest_size=16).digest()
+                if body_hash == self._body_hash:
+                    return
+                if self.capture is not None:
+                    await self.capture.record(self.name or "", [resp.content])
+                items = self._items_of(resp.json())
+                PARSE_SECONDS.labels(self.name).observe(time.perf_counter() - parse_started)
+                results = {id(sub): sub.process_items(items) for sub in self.subscribers}
+        if body_hash == self._body_hash:
+            return
+        self._results = results
+        self._version += 1
+        self._body_hash = body_hash
+        self._etag = resp.headers.get("etag")
+        self._last_modified = resp.headers.get("last-modified")
+
+    async def _consume_stream(
+        self, resp: httpx.Response
+    ) -> Tuple[Dict[int, List[Dict[str, Any]]], bytes, List[bytes]]:
+        # Items are extracted and filtered per subscriber as they arrive, so neither the body
+        # nor the decoded document is ever held in full (unless a capture needs the raw bytes).
+        hasher = hashlib.blake2b(digest_size=16)
+        chunks: List[bytes] = []
+        parser = JSONItemStream(self.extract.get("items_jmespath") or "")
+        sinks: List[Tuple[int, Any, List[Dict[str, Any]]]] = [
+            (id(sub), sub.process_item, []) for sub in self.subscribers
+        ]
+        async for chunk in resp.aiter_bytes():
+            hasher.update(chunk)
+            if self.capture is not None:
+                chunks.append(chunk)
+            for item in parser.feed(chunk):
+                for _, process, out in sinks:
+                    event = process(item)
+                    if event is not None:
+                        out.append(event)
+        return {key: out for key, _, out in sinks}, hasher.digest(), chunks
+
+    async def _fetch_page(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Tuple[bytes, List[Any], Any]:
+        timeout = self.request.get("timeout_seconds")
+        started = time.perf_counter()
+        resp = await client.request(
+            self.request.get("method", "GET").upper(),
+            self.request["url"],
+            headers=self.request.get("headers") or {},
+            params=params,
+            json=self.request.get("body"),
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
         resp.raise_for_status()
+        parse_started = time.perf_counter()
+        FETCH_SECONDS.labels(self.name).observe(parse_started - started)
         data = resp.json()
-        items = self._compiled_expr.search(data) or []
-        if not isinstance(items, list):
-            items = []
-        out: List[Dict[str, Any]] = []
+        PARSE_SECONDS.labels(self.name).observe(time.perf_counter() - parse_started)
+        return resp.content, self._items_of(data), data
+
+    @staticmethod
+    def _consume_page(
+        items: List[Any],
+        sinks: List[Tuple[int, Any, List[Dict[str, Any]]]],
+        stopper: Optional[SortedEarlyStop],
+    ) -> bool:
         for item in items:
-            event: Dict[str, Any] = {}
-            for out_key, path in self.fields.items():
-                event[out_key] = get_by_path(item, path)
-            if self.id_path:
-                event["__id__"] = str(get_by_path(item, self.id_path))
-            if self.updated_at_path:
-                event["__updated_at__"] = get_by_path(item, self.updated_at_path)
-            event["__raw__"] = item
-            out.append(event)
-        return out
-
-    async def poll(self) -> AsyncIterator[List[Dict[str, Any]]]:
+            for index, (_, process, out) in enumerate(sinks):
+                event = process(item)
+                if event is not None:
+                    out.append(event)
+                    if stopper is not None:
+                        stopper.observe(index, item)
+        return bool(items) and stopper is not None and stopper.should_stop(items[-1])
+
+    async def _refresh_paginated(self, pager: Paginator) -> None:
+        # Pages are fetched up to `concurrency` ahead but merged strictly in page order, so the
+        # sorted early stop sees the same sequence a sequential walk would.
+        client = await self._get_client()
+        base = self.request.get("params") or {}
+        hasher = hashlib.blake2b(digest_size=16)
+        sinks: List[Tuple[int, Any, List[Dict[str, Any]]]] = [
+            (id(sub), sub.process_item, []) for sub in self.subscribers
+        ]
+        stopper = pager.early_stop(len(sinks))
+        pending: Dict[int, asyncio.Task[Tuple[bytes, List[Any], Any]]] = {}
+        pages: List[bytes] = []
+        cursor: Any = None
+        stopped = False
         try:
-            while True:
+            for index in range(pager.max_pages):
+                if pager.style == "cursor":
+                    task = asyncio.ensure_future(self._fetch_page(client, pager.params(base, index, cursor)))
+                    pending[index] = task
+                else:
+                    for ahead in range(index, min(index + pager.concurrency, pager.max_pages)):
+                        if ahead not in pending:
+                            pending[ahead] = asyncio.ensure_future(self._fetch_page(client, pager.params(base, ahead)))
+                content, items, data = await pending.pop(index)
+                hasher.update(content)
+                if self.capture is not None:
+                    pages.append(content)
+                if self._consume_page(items, sinks, stopper):
+                    logger.debug("Pagination stopped early after page %d (sorted)", index)
+                    stopped = True
+                    break
+                if pager.is_last_page(len(items)):
+                    break
+                if pager.style == "cursor":
+                    cursor = pager.next_cursor(data)
+                    if not cursor:
+                        break
+        finally:
+            for task in pending.values():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+        body_hash = hasher.digest()
+        if body_hash == self._body_hash:
+            return
+        if self.capture is not None:
+            await self.capture.record(self.name or "", pages)
+        self._results = {key: self._snapshot(out, stopper if stopped else None) for key, _, out in sinks}
+        self._version += 1
+        self._body_hash = body_hash
+
+    @staticmethod
+    def _snapshot(events: List[Dict[str, Any]], stopper: Optional[SortedEarlyStop]) -> List[Dict[str, Any]]:
+        # After an early stop the tracker must not read offers past the last page as removed.
+        return PartialSnapshot(events, stopper.descending) if stopper is not None else events
+
+    def replay_pages(self, pages: List[bytes]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        # Recorded response bodies (one per page) through the same parse, extraction and filters.
+        started = time.perf_counter()
+        page_items = [self._items_of(json.loads(page)) for page in pages]
+        PARSE_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+        if self.paginator is None or not self.paginator.stop_when_sorted:
+            items = [item for page in page_items for item in page]
+            return [(sub.name, sub.process_items(items)) for sub in self.subscribers]
+        # A sorted scan replays page by page, so a capture that stopped early stays partial.
+        sinks: List[Tuple[int, Any, List[Dict[str, Any]]]] = [
+            (id(sub), sub.process_item, []) for sub in self.subscribers
+        ]
+        stopper = self.paginator.early_stop(len(sinks))
+        stopped = False
+        for items in page_items:
+            if self._consume_page(items, sinks, stopper):
+                stopped = True
+                break
+        return [
+            (sub.name, self._snapshot(out, stopper if stopped else None))
+            for sub, (_, _, out) in zip(self.subscribers, sinks)
+        ]
+
+    async def fetch(self, subscriber: "HTTPJSONPoller") -> Tuple[int, List[Dict[str, Any]]]:
+        # Callers within the freshness window share one request and one parse.
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            if self._fetched_at is None or loop.time() - self._fetched_at >= self.fresh_seconds:
                 try:
-                    events = await self._fetch()
-                    yield events
+                    await self._refresh()
+                    self._error = None
                 except Exception as e:
-                    logger.exception("Poller %s fetch error: %s", self.name, e)
-                    yield []
-                await asyncio.sleep(self.interval_seconds)
-        finally:
-            await self.close() 
\ No newline at end of file
+                    self._error = e
+                self._fetched_at = loop.time()
+            if self._error is not None:
+                raise self._error
+            return self._version, self._results.get(id(subscriber), [])
+
+
+class HTTPJSONPoller(EventExtractor):
+    def __init__(
+        self,
+        name: str,
+        request: Dict[str, Any],
+        extract: Dict[str, Any],
+        interval_seconds: int = 15,
+        id_path: Optional[str] = None,
+        updated_at_path: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        source: Optional[HTTPJSONSource] = None,
+        transport: Optional[TransportManager] = None,
+        keep_raw: bool = False,
+        event_filter: Optional[CompiledFilter] = None,
+        min_interval_seconds: Optional[float] = None,
+        dedupe_key_fields: Optional[List[str]] = None,
+        capture: Optional[CaptureWriter] = None,
+    ) -> None:
+        super().__init__(name, id_path, updated_at_path, fields, keep_raw, event_filter, dedupe_key_fields)
+        self.request = request
+        self.extract = extract
+        self.interval_seconds = max(1, interval_seconds)
+        # The scheduler may poll faster than interval_seconds; a shared source must not cache past that.
+        self.min_interval_seconds = min(self.interval_seconds, max(1, min_interval_seconds or self.interval_seconds))
+        self.source = source or HTTPJSONSource(request, extract, self.interval_seconds, transport, capture)
+        self.source.attach(self)
+        self._version = 0
+
+    async def close(self) -> None:
+        await self.source.close()
+
+    async def _fetch(self) -> Optional[List[Dict[str, Any]]]:
+        version, events = await self.source.fetch(self)
+        if version == self._version:
+            return None
+        self._version = version
+        EVENTS_TOTAL.labels(self.name).inc(len(events))
+        return events
+
+    async def poll_once(self) -> Optional[List[Dict[str, Any]]]:
+        # One scheduled cycle: None when the upstream is unchanged, errors propagate to the scheduler.
+        return await self._fetch()
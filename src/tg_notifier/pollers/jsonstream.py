@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_SIMPLE_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_SPECIAL = re.compile(rb'[\[\]{}",:]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_LBRACE, _RBRACE = ord("{"), ord("}")
+_LBRACKET, _RBRACKET = ord("["), ord("]")
+_COMMA, _COLON = ord(","), ord(":")
+
+
+def is_streamable_path(expr: Optional[str]) -> bool:
+    return bool(expr) and _SIMPLE_PATH.match(expr) is not None
+
+
+class JSONItemStream:
+    # Incremental scanner for the array at a dotted object path (e.g. "data.list").
+    # feed() takes raw response chunks and returns the array elements completed so far;
+    # only the element currently being read is buffered, each one decoded with json.loads.
+    def __init__(self, path: str) -> None:
+        self.path: Tuple[str, ...] = tuple(path.split(".")) if path else ()
+        self.found = False
+        self.done = False
+        self._buf = bytearray()
+        self._pos = 0
+        # One [is_object, current_key] frame per open container.
+        self._stack: List[List[Any]] = []
+        self._expect_key = False
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._target_depth: Optional[int] = None
+        self._elem_start: Optional[int] = None
+
+    def _at_path(self) -> bool:
+        if len(self._stack) != len(self.path):
+            return False
+        return all(frame[0] and frame[1] == key for frame, key in zip(self._stack, self.path))
+
+    def _emit(self, end: int, out: List[Any]) -> None:
+        raw = bytes(self._buf[self._elem_start:end]).strip()
+        if raw:
+            out.append(json.loads(raw))
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        out: List[Any] = []
+        if self.done:
+            return out
+        self._buf += chunk
+        buf = self._buf
+        pos = self._pos
+        stack = self._stack
+        while True:
+            if self._in_string:
+                m = _STRING_SPECIAL.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                i = m.start()
+                if buf[i] == _BACKSLASH:
+                    if i + 1 >= len(buf):
+                        pos = i
+                        break
+                    pos = i + 2
+                    continue
+                self._in_string = False
+                pos = i + 1
+                if self._string_is_key:
+                    stack[-1][1] = json.loads(bytes(buf[self._string_start:pos]))
+                continue
+            m = _SPECIAL.search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            i = m.start()
+            c = buf[i]
+            pos = i + 1
+            if c == _QUOTE:
+                self._in_string = True
+                self._string_start = i
+                # Keys only matter on the way down to the target array.
+                self._string_is_key = (
+                    self._expect_key and not self.found and 0 < len(stack) <= len(self.path) and stack[-1][0]
+                )
+            elif c == _LBRACE or c == _LBRACKET:
+                if c == _LBRACKET and not self.found and self._at_path():
+                    self.found = True
+                    self._target_depth = len(stack) + 1
+                    self._elem_start = pos
+                stack.append([c == _LBRACE, None])
+                self._expect_key = c == _LBRACE
+            elif c == _RBRACE or c == _RBRACKET:
+                if self._target_depth is not None and len(stack) == self._target_depth:
+                    self._emit(i, out)
+                    self._target_depth = None
+                    self._elem_start = None
+                    self.done = True
+                    break
+                if stack:
+                    stack.pop()
+                self._expect_key = False
+            elif c == _COMMA:
+                if self._target_depth is not None and len(stack) == self._target_depth:
+                    self._emit(i, out)
+                    self._elem_start = pos
+                elif stack and stack[-1][0]:
+                    self._expect_key = True
+            elif c == _COLON:
+                self._expect_key = False
+        # Drop everything already consumed, keeping the element (or string) in progress.
+        if self.done:
+            self._buf = bytearray()
+            self._pos = 0
+            return out
+        keep = pos
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if self._elem_start is not None:
+            keep = min(keep, self._elem_start)
+        if keep:
+            del buf[:keep]
+            if self._elem_start is not None:
+                self._elem_start -= keep
+            if self._in_string:
+                self._string_start -= keep
+        self._pos = pos - keep
+        return out
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from ..orderbook import to_price
+from ..utils import compile_path
+
+_DEFAULT_PARAM = {"page": "page", "offset": "offset", "cursor": "cursor"}
+
+
+class Paginator:
+    def __init__(self, conf: Dict[str, Any]) -> None:
+        self.style = conf.get("style", "page")
+        if self.style not in _DEFAULT_PARAM:
+            raise ValueError(f"Unknown pagination style: {self.style}")
+        self.param = conf.get("param") or _DEFAULT_PARAM[self.style]
+        self.size_param: Optional[str] = conf.get("size_param")
+        self.size: Optional[int] = int(conf["size"]) if conf.get("size") else None
+        self.start = int(conf.get("start", 1 if self.style == "page" else 0))
+        self.max_pages = max(1, int(conf.get("max_pages", 10)))
+        # Cursor pages depend on the previous response, so they are always fetched one at a time.
+        self.concurrency = 1 if self.style == "cursor" else max(1, int(conf.get("concurrency", 3)))
+        self.cursor_getter = compile_path(conf.get("cursor_path") or "next_cursor")
+        self.stop_when_sorted: Optional[Dict[str, Any]] = conf.get("stop_when_sorted")
+
+    def params(self, base: Dict[str, Any], index: int, cursor: Any = None) -> Dict[str, Any]:
+        params = dict(base)
+        if self.size_param and self.size:
+            params[self.size_param] = self.size
+        if self.style == "page":
+            params[self.param] = self.start + index
+        elif self.style == "offset":
+            params[self.param] = self.start + index * (self.size or 0)
+        elif cursor is not None:
+            params[self.param] = cursor
+        return params
+
+    def next_cursor(self, data: Any) -> Any:
+        return self.cursor_getter(data)
+
+    def is_last_page(self, count: int) -> bool:
+        return count == 0 or (self.size is not None and count < self.size)
+
+    def early_stop(self, subscribers: int) -> Optional["SortedEarlyStop"]:
+        if not self.stop_when_sorted:
+            return None
+        return SortedEarlyStop(
+            self.stop_when_sorted.get("path") or self.stop_when_sorted.get("key") or "price",
+            str(self.stop_when_sorted.get("order", "asc")),
+            subscribers,
+        )
+
+
+class SortedEarlyStop:
+    # With the upstream sorted by `path`, each subscriber's first accepted item is its best.
+    # Once every subscriber has one and a page ends strictly past all of them (so ties on
+    # the next page are impossible), later pages cannot produce a better offer.
+    def __init__(self, path: str, order: str, subscribers: int) -> None:
+        self.getter = compile_path(path)
+        self.descending = order.lower() == "desc"
+        self.subscribers = subscribers
+        self.best: Dict[int, float] = {}
+
+    def observe(self, subscriber_index: int, item: Any) -> None:
+        if subscriber_index not in self.best:
+            self.best[subscriber_index] = to_price(self.getter(item))
+
+    def should_stop(self, last_item: Any) -> bool:
+        if len(self.best) < self.subscribers:
+            return False
+        last = to_price(self.getter(last_item))
+        if self.descending:
+            return last < min(self.best.values())
+        return last > max(self.best.values())
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import jmespath
+
+from ..filters import CompiledFilter
+from ..metrics import EVENTS_TOTAL, POLL_ERRORS_TOTAL
+from .extract import EventExtractor
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError:  # websockets is optional; only `type: websocket` sources need it
+    ws_connect = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Submit = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+PUSH_TYPES = ("webhook", "websocket")
+
+DEFAULT_WEBHOOK: Dict[str, Any] = {
+    "host": "127.0.0.1",
+    "port": 9465,
+    "max_body_bytes": 1 << 20,
+}
+
+_REASONS = {
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class PushPoller(EventExtractor):
+    # A source the upstream pushes to instead of being polled. Each message is run through the
+    # same extraction and filter as a polled page and handed to `submit` right away. With
+    # `snapshot: false` (the default) a message carries new events only; with `snapshot: true`
+    # it is the full current set, like a poll response.
+    def __init__(
+        self,
+        name: str,
+        extract: Optional[Dict[str, Any]] = None,
+        snapshot: bool = False,
+        id_path: Optional[str] = None,
+        updated_at_path: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        keep_raw: bool = False,
+        event_filter: Optional[CompiledFilter] = None,
+        dedupe_key_fields: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__(name, id_path, updated_at_path, fields, keep_raw, event_filter, dedupe_key_fields)
+        self.extract = extract or {}
+        self.snapshot = snapshot
+        items_expr = self.extract.get("items_jmespath")
+        self._compiled_expr = jmespath.compile(items_expr) if items_expr else None
+        self._submit: Optional[Submit] = None
+
+    def _items_of(self, data: Any) -> List[Any]:
+        # Without items_jmespath a message is one item, or a list of items.
+        if self._compiled_expr is not None:
+            items = self._compiled_expr.search(data)
+        else:
+            items = data
+        if isinstance(items, list):
+            return items
+        return [items] if isinstance(items, dict) else []
+
+    async def ingest(self, data: Any) -> int:
+        if self._submit is None:
+            return 0
+        events = self.process_items(self._items_of(data))
+        if not events and not self.snapshot:
+            return 0
+        EVENTS_TOTAL.labels(self.name).inc(len(events))
+        await self._submit(self.name, events)
+        return len(events)
+
+    async def start(self, submit: Submit) -> None:
+        self._submit = submit
+
+    async def close(self) -> None:
+        self._submit = None
+
+
+class WebhookServer:
+    # Minimal local HTTP receiver: each `type: webhook` poller owns a path, and a POSTed JSON
+    # body is ingested before the response is written, so a busy pipeline slows the sender down
+    # rather than queueing without bound. Listens once the first webhook poller starts.
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        opts = {**DEFAULT_WEBHOOK, **(config or {})}
+        self.host = opts["host"]
+        self.port = int(opts["port"])
+        self.max_body_bytes = int(opts["max_body_bytes"])
+        self.pollers: Dict[str, WebhookPoller] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def register(self, poller: "WebhookPoller") -> None:
+        if poller.path in self.pollers and self.pollers[poller.path] is not poller:
+            raise ValueError(f"Webhook path {poller.path} already used by {self.pollers[poller.path].name}")
+        self.pollers[poller.path] = poller
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info("Webhook receiver on http://%s:%d", self.host, self.port)
+
+    def unregister(self, poller: "WebhookPoller") -> None:
+        if self.pollers.get(poller.path) is poller:
+            del self.pollers[poller.path]
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            headers: Dict[str, str] = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            poller = self.pollers.get(parts[1].split("?")[0]) if len(parts) >= 2 else None
+            if poller is None:
+                self._respond(writer, 404, {"ok": False, "error": "unknown path"})
+            elif parts[0] != "POST":
+                self._respond(writer, 405, {"ok": False, "error": "POST only"})
+            elif not poller.authorized(headers):
+                self._respond(writer, 401, {"ok": False, "error": "bad secret"})
+            else:
+                length = int(headers.get("content-length") or 0)
+                if length > self.max_body_bytes:
+                    self._respond(writer, 413, {"ok": False, "error": "body too large"})
+                else:
+                    body = await asyncio.wait_for(reader.readexactly(length), timeout=30)
+                    try:
+                        data = json.loads(body)
+                    except ValueError:
+                        self._respond(writer, 400, {"ok": False, "error": "invalid JSON"})
+                    else:
+                        events = await poller.ingest(data)
+                        self._respond(writer, 202, {"ok": True, "events": events})
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except Exception as e:
+            logger.exception("Webhook handler error: %s", e)
+        finally:
+            writer.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class WebhookPoller(PushPoller):
+    # Receives events POSTed to `path` on the shared WebhookServer. With `secret` set, requests
+    # must carry it in the X-Webhook-Secret header.
+    def __init__(self, name: str, server: WebhookServer, path: Optional[str] = None,
+                 secret: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(name, **kwargs)
+        self.server = server
+        self.path = "/" + (path or f"hooks/{name}").lstrip("/")
+        self.secret = secret
+
+    def authorized(self, headers: Dict[str, str]) -> bool:
+        if not self.secret:
+            return True
+        return hmac.compare_digest(headers.get("x-webhook-secret", ""), self.secret)
+
+    async def start(self, submit: Submit) -> None:
+        await super().start(submit)
+        await self.server.register(self)
+
+    async def close(self) -> None:
+        self.server.unregister(self)
+        await super().close()
+
+
+class WebSocketPoller(PushPoller):
+    # Subscribes to a WebSocket feed and ingests every JSON message. After a dropped connection
+    # it reconnects with jittered exponential backoff and sends the `subscribe` messages again.
+    # Messages the items path finds nothing in (acks, heartbeats) are ignored.
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        subscribe: Optional[List[Any]] = None,
+        reconnect_seconds: float = 1,
+        max_reconnect_seconds: float = 60,
+        ping_interval_seconds: Optional[float] = 20,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.headers = headers or {}
+        self.subscribe = subscribe or []
+        self.reconnect_seconds = max(0.1, float(reconnect_seconds))
+        self.max_reconnect_seconds = max(self.reconnect_seconds, float(max_reconnect_seconds))
+        self.ping_interval_seconds = ping_interval_seconds
+        self._delay = self.reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def _session(self) -> None:
+        async with ws_connect(
+            self.url,
+            additional_headers=self.headers,
+            ping_interval=self.ping_interval_seconds,
+            max_size=None,
+        ) as ws:
+            for message in self.subscribe:
+                await ws.send(message if isinstance(message, str) else json.dumps(message))
+            logger.info("WebSocket source %s connected to %s", self.name, self.url)
+            self._delay = self.reconnect_seconds
+            async for raw in ws:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    logger.debug("WebSocket source %s: ignoring non-JSON message", self.name)
+                    continue
+                await self.ingest(data)
+
+    async def _run(self) -> None:
+        self._delay = self.reconnect_seconds
+        while True:
+            try:
+                await self._session()
+                logger.warning("WebSocket source %s closed by the server", self.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                POLL_ERRORS_TOTAL.labels(self.name, "error").inc()
+                logger.error("WebSocket source %s error, reconnecting in %.1fs: %s", self.name, self._delay, e)
+            await asyncio.sleep(self._delay * random.uniform(0.8, 1.2))
+            self._delay = min(self.max_reconnect_seconds, self._delay * 2)
+
+    async def start(self, submit: Submit) -> None:
+        await super().start(submit)
+        if ws_connect is None:
+            logger.error("WebSocket source %s needs the websockets package; not started", self.name)
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await super().close()
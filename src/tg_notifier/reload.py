@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import signal
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELOAD: Dict[str, Any] = {
+    "enabled": True,
+    "watch_interval_seconds": 2,
+}
+
+# Sections applied by a reload; a change anywhere else only takes effect after a restart.
+RELOADABLE = ("pollers", "notifiers", "routes")
+
+
+class SectionDiff(NamedTuple):
+    added: Set[str]
+    removed: Set[str]
+    changed: Set[str]
+
+
+def diff_section(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> SectionDiff:
+    old, new = old or {}, new or {}
+    return SectionDiff(
+        added=set(new) - set(old),
+        removed=set(old) - set(new),
+        changed={name for name in set(old) & set(new) if old[name] != new[name]},
+    )
+
+
+def restart_only_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Set[str]:
+    keys = (set(old) | set(new)) - set(RELOADABLE)
+    return {key for key in keys if old.get(key) != new.get(key)}
+
+
+class ConfigWatcher:
+    # Calls `on_change` when the config file's content changes (polled every
+    # watch_interval_seconds; 0 disables polling) or when the process receives SIGHUP.
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[], Awaitable[None]],
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        opts = {**DEFAULT_RELOAD, **(config or {})}
+        self.enabled = bool(opts["enabled"])
+        self.path = path
+        self.on_change = on_change
+        self.interval = float(opts["watch_interval_seconds"] or 0)
+        self._mtime: Optional[float] = None
+        self._digest = self._read_digest()
+        self._trigger = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._sighup = False
+
+    def _read_digest(self) -> Optional[bytes]:
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+            with open(self.path, "rb") as f:
+                return hashlib.blake2b(f.read(), digest_size=16).digest()
+        except OSError:
+            return None
+
+    def _changed(self) -> bool:
+        # Cheap mtime check first; the content hash skips saves that did not change anything.
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        digest = self._read_digest()
+        if digest is None or digest == self._digest:
+            return False
+        self._digest = digest
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._trigger.wait(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                pass
+            forced = self._trigger.is_set()
+            self._trigger.clear()
+            changed = await asyncio.to_thread(self._changed)
+            if not (forced or changed):
+                continue
+            try:
+                await self.on_change()
+            except Exception as e:
+                logger.exception("Config reload failed, keeping the running config: %s", e)
+
+    def trigger(self) -> None:
+        self._trigger.set()
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, self.trigger)
+            self._sighup = True
+        except (AttributeError, NotImplementedError, RuntimeError):
+            logger.debug("SIGHUP reload not available on this platform")
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._sighup:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._sighup = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
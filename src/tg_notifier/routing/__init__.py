@@ -1,3 +1,5 @@
-from .router import Router
+from .coalesce import Coalescer
+from .live import LiveMessages
+from .router import CompiledRoute, Delivery, OutboundMessage, Router
 
-__all__ = ["Router"] 
\ No newline at end of file
+__all__ = ["Coalescer", "CompiledRoute", "Delivery", "LiveMessages", "OutboundMessage", "Router"]
\ No newline at end of file
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..notifiers.telegram import pack_messages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 1.0
+DEFAULT_SEPARATOR = "\n\n"
+
+
+class _Batch:
+    def __init__(self, window_seconds: float, separator: str) -> None:
+        self.window_seconds = window_seconds
+        self.separator = separator
+        self.texts: List[str] = []
+        self.done: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+
+
+class Coalescer:
+    def __init__(self) -> None:
+        self._pending: Dict[Tuple[int, str, Optional[str]], _Batch] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    @staticmethod
+    def options(coalesce: Any) -> Tuple[float, str]:
+        if isinstance(coalesce, dict):
+            window = float(coalesce.get("window_seconds", DEFAULT_WINDOW_SECONDS))
+            return max(0.0, window), coalesce.get("separator", DEFAULT_SEPARATOR)
+        return DEFAULT_WINDOW_SECONDS, DEFAULT_SEPARATOR
+
+    async def add(
+        self,
+        notifier: Any,
+        chat_id: str | int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        coalesce: Any = True,
+    ) -> Any:
+        # Messages for the same (notifier, chat, parse_mode) that arrive within the window,
+        # from any poller, are packed into as few sendMessage calls as the length limit allows.
+        key = (id(notifier), str(chat_id), parse_mode)
+        batch = self._pending.get(key)
+        if batch is None:
+            window, separator = self.options(coalesce)
+            batch = _Batch(window, separator)
+            self._pending[key] = batch
+            task = asyncio.create_task(self._flush_later(key, batch, notifier, chat_id, parse_mode))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.texts.append(text)
+        # Resolves to the first failed sendMessage result of the batch, or the last success.
+        return await asyncio.shield(batch.done)
+
+    async def _flush_later(
+        self,
+        key: Tuple[int, str, Optional[str]],
+        batch: _Batch,
+        notifier: Any,
+        chat_id: str | int,
+        parse_mode: Optional[str],
+    ) -> None:
+        try:
+            await asyncio.sleep(batch.window_seconds)
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            result: Any = None
+            for chunk in pack_messages(batch.texts, batch.separator):
+                result = await notifier.send_message(chat_id=chat_id, text=chunk, parse_mode=parse_mode)
+                if isinstance(result, dict) and not result.get("ok", True):
+                    break
+            batch.done.set_result(result)
+        except Exception as e:
+            logger.exception("Coalesced delivery to %s failed: %s", chat_id, e)
+            batch.done.set_exception(e)
+        finally:
+            if not batch.done.done():
+                batch.done.set_result(None)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from ..notifiers.telegram import split_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+# editMessageText errors after which the message is replaced by a new one.
+_GONE = ("message to edit not found", "message can't be edited", "message_id_invalid")
+
+
+class _Update:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.done: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+
+
+def _digest(text: str, parse_mode: Optional[str]) -> str:
+    return hashlib.blake2b(f"{parse_mode}\x00{text}".encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _description(result: Any) -> str:
+    return str(result.get("description") or "").lower() if isinstance(result, dict) else ""
+
+
+class LiveMessages:
+    # Keeps one message per (route, notifier, chat) current instead of sending a new one per
+    # alert: the first update sends (and pins) it, later ones edit it in place. Updates within
+    # the debounce window collapse into one edit of the latest text, and an edit that would not
+    # change the text is skipped, so Bot API calls stay bounded however often the feed moves.
+    # Message ids live in the state store, so a restart keeps editing the same message.
+    def __init__(self, state: Any = None) -> None:
+        self.state = state
+        self._pending: Dict[str, _Update] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._records: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    @staticmethod
+    def options(live: Any) -> Tuple[float, bool]:
+        if isinstance(live, dict):
+            debounce = float(live.get("debounce_seconds", DEFAULT_DEBOUNCE_SECONDS))
+            return max(0.0, debounce), bool(live.get("pin", True))
+        return DEFAULT_DEBOUNCE_SECONDS, True
+
+    async def update(
+        self,
+        key: str,
+        notifier: Any,
+        chat_id: str | int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        live: Any = True,
+    ) -> Any:
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Update(text)
+            task = asyncio.create_task(self._flush_later(key, pending, notifier, chat_id, parse_mode, live))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            pending.text = text
+        # Every superseded update resolves with the result of the edit that replaced it.
+        return await asyncio.shield(pending.done)
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if key not in self._records:
+            self._records[key] = await self.state.load_live_message(key) if self.state is not None else None
+        return self._records[key]
+
+    async def _save(self, key: str, record: Optional[Dict[str, Any]]) -> None:
+        self._records[key] = record
+        if self.state is not None:
+            await self.state.save_live_message(key, record)
+
+    async def _flush_later(
+        self,
+        key: str,
+        pending: _Update,
+        notifier: Any,
+        chat_id: str | int,
+        parse_mode: Optional[str],
+        live: Any,
+    ) -> None:
+        debounce, pin = self.options(live)
+        try:
+            await asyncio.sleep(debounce)
+            if key not in self._locks:
+                self._locks[key] = asyncio.Lock()
+            # A flush still running for this key must store its message id before the next one looks.
+            async with self._locks[key]:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+                pending.done.set_result(await self._apply(key, notifier, chat_id, pending.text, parse_mode, pin))
+        except Exception as e:
+            logger.exception("Live message update for %s failed: %s", key, e)
+            if not pending.done.done():
+                pending.done.set_exception(e)
+        finally:
+            if not pending.done.done():
+                pending.done.set_result(None)
+
+    async def _apply(
+        self, key: str, notifier: Any, chat_id: str | int, text: str, parse_mode: Optional[str], pin: bool
+    ) -> Any:
+        # A live message cannot be split, so only its first chunk is shown.
+        text = split_message(text)[0]
+        digest = _digest(text, parse_mode)
+        record = await self._load(key)
+        if record is not None and record.get("chat_id") == str(chat_id):
+            if record.get("digest") == digest:
+                return {"ok": True, "result": {"message_id": record["message_id"]}, "unchanged": True}
+            result = await notifier.edit_message_text(
+                chat_id=chat_id, message_id=record["message_id"], text=text, parse_mode=parse_mode
+            )
+            ok = isinstance(result, dict) and result.get("ok", True)
+            if ok or "message is not modified" in _description(result):
+                await self._save(key, {**record, "digest": digest})
+                return {"ok": True, "result": {"message_id": record["message_id"]}}
+            if not any(reason in _description(result) for reason in _GONE):
+                return result
+            logger.info("Live message %s is gone, sending a new one", key)
+        result = await notifier.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+        if not (isinstance(result, dict) and result.get("ok", True)):
+            return result
+        message_id = (result.get("result") or {}).get("message_id")
+        if message_id is None:
+            return result
+        await self._save(key, {"chat_id": str(chat_id), "message_id": message_id, "digest": digest})
+        if pin:
+            pinned = await notifier.pin_chat_message(chat_id=chat_id, message_id=message_id)
+            if isinstance(pinned, dict) and not pinned.get("ok", True):
+                logger.warning("Could not pin live message %s: %s", key, pinned.get("description"))
+        return result
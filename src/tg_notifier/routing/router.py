@@ -1,46 +1,155 @@
 from __future__ import annotations
 
-import asyncio
+import fnmatch
 import logging
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Awaitable, Dict, List, NamedTuple, Optional, Tuple
 
+from ..filters import CompiledFilter
+from ..notifiers.sink import SinkNotifier
 from ..notifiers.telegram import TelegramNotifier
-from ..utils import render_template, format_numbers_in_mapping
+from ..utils import compile_template
+from .coalesce import Coalescer
+from .live import LiveMessages
 
 logger = logging.getLogger(__name__)
 
+RenderCache = Dict[Tuple[str, int], str]
+
+_NOTIFIER_TYPES = (TelegramNotifier, SinkNotifier)
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_FILTER_KEYS = ("where", "where_in", "where_gte", "where_lte", "where_range", "where_regex")
+
+
+class Delivery:
+    def __init__(self, conf: Dict[str, Any], notifier: Any) -> None:
+        self.notifier_name = conf.get("notifier")
+        self.notifier = notifier
+        self.chat_id = conf.get("chat_id")
+        self.template: str = conf.get("template", "{__raw__}")
+        self.parse_mode: Optional[str] = conf.get("parse_mode")
+        self.coalesce = conf.get("coalesce")
+        # Keep one message per (route, chat) up to date via editMessageText instead of sending new ones.
+        self.live = conf.get("live")
+
+
+class OutboundMessage(NamedTuple):
+    poller_name: str
+    route: Optional["CompiledRoute"]
+    delivery: Delivery
+    text: str
+
+
+class CompiledRoute:
+    def __init__(self, conf: Dict[str, Any], notifiers: Dict[str, Any]) -> None:
+        self.name = conf.get("name")
+        match = conf.get("match") or {}
+        self.poller_name: Optional[str] = match.get("poller_name")
+        self.poller_regex = re.compile(match["poller_regex"]) if match.get("poller_regex") else None
+        self.is_pattern = bool(self.poller_regex) or bool(self.poller_name and _GLOB_CHARS.search(self.poller_name))
+        self.event_filter: Optional[CompiledFilter] = (
+            CompiledFilter(match) if any(match.get(k) for k in _FILTER_KEYS) else None
+        )
+        self.deliveries: List[Delivery] = []
+        for d in conf.get("deliveries") or []:
+            notifier = notifiers.get(d.get("notifier"))
+            if isinstance(notifier, _NOTIFIER_TYPES):
+                self.deliveries.append(Delivery(d, notifier))
+            else:
+                logger.warning("Route %s: unknown notifier %s, delivery skipped", self.name, d.get("notifier"))
+
+    def matches_poller(self, poller_name: str) -> bool:
+        if self.poller_regex is not None and not self.poller_regex.search(poller_name):
+            return False
+        if self.poller_name:
+            return fnmatch.fnmatchcase(poller_name, self.poller_name)
+        return True
+
 
 class Router:
-    def __init__(self, notifiers: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        notifiers: Dict[str, Any],
+        routes: Optional[List[Dict[str, Any]]] = None,
+        state: Any = None,
+    ) -> None:
         self.notifiers: Dict[str, Any] = notifiers
+        self.coalescer = Coalescer()
+        self.live = LiveMessages(state)
+        self.set_routes(routes or [])
+
+    def set_routes(self, routes: List[Dict[str, Any]]) -> None:
+        # Exact poller names go into a dict; only wildcard/regex/catch-all routes are scanned,
+        # and that scan is memoized per poller name.
+        self.routes: List[CompiledRoute] = [CompiledRoute(r, self.notifiers) for r in routes]
+        self._by_poller: Dict[str, List[Tuple[int, CompiledRoute]]] = {}
+        self._scanned: List[Tuple[int, CompiledRoute]] = []
+        for i, route in enumerate(self.routes):
+            if route.poller_name and not route.is_pattern:
+                self._by_poller.setdefault(route.poller_name, []).append((i, route))
+            else:
+                self._scanned.append((i, route))
+        self._resolved: Dict[str, List[CompiledRoute]] = {}
+
+    def routes_for(self, poller_name: str) -> List[CompiledRoute]:
+        resolved = self._resolved.get(poller_name)
+        if resolved is None:
+            candidates = list(self._by_poller.get(poller_name, []))
+            candidates += [(i, r) for i, r in self._scanned if r.matches_poller(poller_name)]
+            resolved = self._resolved[poller_name] = [r for _, r in sorted(candidates, key=lambda c: c[0])]
+        return resolved
+
+    @staticmethod
+    def render(template: str, event: Dict[str, Any], cache: Optional[RenderCache] = None) -> str:
+        # Keyed by event identity: the cache only lives for one render_messages() call, while the events are alive.
+        if cache is None:
+            return compile_template(template).render(event)
+        key = (template, id(event))
+        text = cache.get(key)
+        if text is None:
+            text = cache[key] = compile_template(template).render(event)
+        return text
+
+    def send(self, message: OutboundMessage) -> Awaitable[Any]:
+        d = message.delivery
+        if d.live:
+            route_name = getattr(message.route, "name", None) or message.poller_name
+            return self.live.update(
+                f"{route_name}|{d.notifier_name}|{d.chat_id}",
+                d.notifier,
+                chat_id=d.chat_id,
+                text=message.text,
+                parse_mode=d.parse_mode,
+                live=d.live,
+            )
+        if d.coalesce:
+            return self.coalescer.add(
+                d.notifier,
+                chat_id=d.chat_id,
+                text=message.text,
+                parse_mode=d.parse_mode,
+                coalesce=d.coalesce,
+            )
+        return d.notifier.send_message(chat_id=d.chat_id, text=message.text, parse_mode=d.parse_mode)
+
+    def render_messages(self, poller_name: str, events: List[Dict[str, Any]]) -> List[OutboundMessage]:
+        render_cache: RenderCache = {}
+        messages: List[OutboundMessage] = []
+        for route in self.routes_for(poller_name):
+            for event in events:
+                if route.event_filter is not None and not route.event_filter.predicate(event):
+                    continue
+                for d in route.deliveries:
+                    text = self.render(event.get("__template__") or d.template, event, render_cache)
+                    messages.append(OutboundMessage(poller_name, route, d, text))
+        return messages
 
-    async def deliver(self, route: Dict[str, Any], poller_name: str, events: List[Dict[str, Any]]) -> None:
-        match = route.get("match", {})
-        if match.get("poller_name") and match.get("poller_name") != poller_name:
-            return
-        deliveries = route.get("deliveries", [])
-        tasks = []
-        for event in events:
-            for d in deliveries:
-                notifier_name = d.get("notifier")
-                notifier = self.notifiers.get(notifier_name)
-                if isinstance(notifier, TelegramNotifier):
-                    mapping = format_numbers_in_mapping(event)
-                    tmpl = event.get("__template__") or d.get("template", "{__raw__}")
-                    text = render_template(tmpl, mapping)
-                    tasks.append(
-                        notifier.send_message(
-                            chat_id=d.get("chat_id"),
-                            text=text,
-                        )
-                    )
-        if tasks:
-            try:
-                await asyncio.gather(*tasks)
-            except Exception as e:
-                logger.exception("Router deliver error: %s", e)
-
-    async def deliverers(self, routes: List[Dict[str, Any]], poller_name: str, events: List[Dict[str, Any]]) -> None:
-        tasks = [self.deliver(route, poller_name, events) for route in routes]
-        if tasks:
-            await asyncio.gather(*tasks) 
\ No newline at end of file
+    def restore_message(self, record: Dict[str, Any]) -> Optional[OutboundMessage]:
+        # Rebuild a message persisted by the outbox; the route may have been renamed since.
+        notifier = self.notifiers.get(record.get("notifier"))
+        if not isinstance(notifier, _NOTIFIER_TYPES):
+            logger.warning("Outbox message for unknown notifier %s dropped", record.get("notifier"))
+            return None
+        route = next((r for r in self.routes if r.name == record.get("route")), None)
+        delivery = Delivery(record, notifier)
+        return OutboundMessage(record.get("poller") or "", route, delivery, record.get("text") or "")
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .metrics import POLL_ERRORS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+DEFAULT_SCHEDULER: Dict[str, Any] = {
+    "jitter_ratio": 0.1,
+    "max_backoff_seconds": 600,
+    "speedup_factor": 0.5,
+    "slowdown_factor": 1.5,
+}
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    # Retry-After is either delta-seconds or an HTTP-date.
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class _Schedule:
+    def __init__(
+        self,
+        poller: Any,
+        handler: Handler,
+        min_interval: Optional[float],
+        max_interval: Optional[float],
+    ) -> None:
+        self.poller = poller
+        self.handler = handler
+        self.base_interval = float(poller.interval_seconds)
+        self.min_interval = float(min_interval) if min_interval else self.base_interval
+        self.max_interval = float(max_interval) if max_interval else self.base_interval
+        if self.min_interval > self.max_interval:
+            self.min_interval, self.max_interval = self.max_interval, self.min_interval
+        self.interval = min(max(self.base_interval, self.min_interval), self.max_interval)
+        self.failures = 0
+        self.due = 0.0
+        self.removed = False
+
+
+class PollScheduler:
+    # One timer heap drives every poller: each run is scheduled from its previous due time
+    # (fixed rate, not fixed delay), with jitter so pollers sharing an interval drift apart.
+    # Errors back off exponentially (429 honours Retry-After); pollers with
+    # min/max_interval_seconds speed up while the data changes and slow down while it is quiet.
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        opts = {**DEFAULT_SCHEDULER, **(config or {})}
+        self.jitter_ratio = max(0.0, float(opts["jitter_ratio"]))
+        self.max_backoff_seconds = float(opts["max_backoff_seconds"])
+        self.speedup_factor = float(opts["speedup_factor"])
+        self.slowdown_factor = float(opts["slowdown_factor"])
+        self._schedules: List[_Schedule] = []
+        self._heap: List[Tuple[float, int, _Schedule]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+        self._started = False
+
+    def add(
+        self,
+        poller: Any,
+        handler: Handler,
+        min_interval_seconds: Optional[float] = None,
+        max_interval_seconds: Optional[float] = None,
+    ) -> None:
+        schedule = _Schedule(poller, handler, min_interval_seconds, max_interval_seconds)
+        self._schedules.append(schedule)
+        if self._started:
+            self._push(schedule, asyncio.get_running_loop().time() + self._stagger(schedule))
+
+    def remove(self, poller: Any) -> None:
+        # A run already in flight finishes, but the poller is not scheduled again.
+        for schedule in [s for s in self._schedules if s.poller is poller]:
+            schedule.removed = True
+            self._schedules.remove(schedule)
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def _jittered(self, delay: float) -> float:
+        if not self.jitter_ratio:
+            return delay
+        return max(0.0, delay * (1 + random.uniform(-self.jitter_ratio, self.jitter_ratio)))
+
+    def _stagger(self, schedule: _Schedule) -> float:
+        return random.uniform(0, schedule.interval * self.jitter_ratio)
+
+    def _push(self, schedule: _Schedule, due: float) -> None:
+        schedule.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), schedule))
+        self._wakeup.set()
+
+    def _adapt(self, schedule: _Schedule, changed: bool) -> None:
+        if schedule.min_interval == schedule.max_interval:
+            return
+        if changed:
+            schedule.interval = max(schedule.min_interval, schedule.interval * self.speedup_factor)
+        else:
+            schedule.interval = min(schedule.max_interval, schedule.interval * self.slowdown_factor)
+
+    def _backoff(self, schedule: _Schedule, exc: BaseException) -> float:
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return retry_after
+        delay = schedule.interval * (2 ** min(schedule.failures, 16))
+        return min(self.max_backoff_seconds, delay)
+
+    async def _run_once(self, schedule: _Schedule) -> Optional[float]:
+        # Returns the delay until the next run, or None to keep the fixed-rate cadence.
+        poller = schedule.poller
+        try:
+            events = await poller.poll_once()
+        except Exception as e:
+            schedule.failures += 1
+            delay = self._backoff(schedule, e)
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+                POLL_ERRORS_TOTAL.labels(poller.name, "rate_limited").inc()
+                logger.warning("Poller %s rate limited, retrying in %.1fs", poller.name, delay)
+            else:
+                POLL_ERRORS_TOTAL.labels(poller.name, "error").inc()
+                logger.error("Poller %s fetch error (%d in a row), retrying in %.1fs: %s",
+                             poller.name, schedule.failures, delay, e)
+            return delay
+        schedule.failures = 0
+        self._adapt(schedule, events is not None)
+        if events is None:
+            logger.debug("Poller %s response unchanged, skipping", poller.name)
+        else:
+            # An empty snapshot is still news: the tracker reports the tracked offer as gone.
+            try:
+                await schedule.handler(poller.name, events)
+            except Exception as e:
+                logger.exception("Poller %s handler error: %s", poller.name, e)
+        return None
+
+    async def _run_scheduled(self, schedule: _Schedule) -> None:
+        loop = asyncio.get_running_loop()
+        delay = await self._run_once(schedule)
+        if schedule.removed:
+            return
+        now = loop.time()
+        if delay is not None:
+            self._push(schedule, now + self._jittered(delay))
+            return
+        due = schedule.due + self._jittered(schedule.interval)
+        # A run that overran its slot starts the next one right away instead of bursting to catch up.
+        self._push(schedule, max(due, now))
+
+    async def run(self, once: bool = False) -> None:
+        if once:
+            await asyncio.gather(*[self._run_once(s) for s in self._schedules])
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._started = True
+        for schedule in self._schedules:
+            # Stagger the first round so pollers do not all fire in the same tick.
+            self._push(schedule, now + self._stagger(schedule))
+        try:
+            while True:
+                if not self._heap:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                delay = self._heap[0][0] - loop.time()
+                if delay > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                _, _, schedule = heapq.heappop(self._heap)
+                if schedule.removed:
+                    continue
+                # A poller is out of the heap while it runs, so its runs never overlap.
+                task = asyncio.create_task(self._run_scheduled(schedule))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+        finally:
+            self._started = False
+            for task in self._running:
+                task.cancel()
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
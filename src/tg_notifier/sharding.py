@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing as mp
+import json
+import os
+import struct
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .metrics import EVENTS_TOTAL
+from .orderbook import PartialSnapshot
+from .pollers.http_json import request_signature
+from .utils import configure_logging, dump_json, load_yaml_with_env
+
+logger = logging.getLogger(__name__)
+
+Submit = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+DEFAULT_SHARDING: Dict[str, Any] = {
+    "workers": 0,
+    "restart_delay_seconds": 5,
+}
+
+# Event batches travel as length-prefixed JSON objects {"poller", "events", "partial"}: events are
+# JSON-derived, and JSON cannot run code the way unpickling whatever reaches the socket could.
+_LENGTH = struct.Struct("<I")
+
+
+def assign_shards(pollers: Dict[str, Dict[str, Any]], workers: int) -> Dict[int, List[str]]:
+    # Pollers with `shard: N` go where they are told. The rest are grouped by request, so pollers
+    # sharing a source stay in one process, and groups are placed in stable hash order onto the
+    # least loaded shard: the same config always yields the same layout.
+    shards: Dict[int, List[str]] = {i: [] for i in range(workers)}
+    groups: Dict[str, List[str]] = {}
+    for name, conf in pollers.items():
+        if conf.get("shard") is not None:
+            shards[int(conf["shard"]) % workers].append(name)
+            continue
+        signature = request_signature(conf.get("request") or {}, conf.get("extract") or {})
+        groups.setdefault(hashlib.blake2b(signature.encode("utf-8"), digest_size=8).hexdigest(), []).append(name)
+    for _, names in sorted(groups.items()):
+        target = min(shards, key=lambda i: (len(shards[i]), i))
+        shards[target].extend(names)
+    return {i: names for i, names in shards.items() if names}
+
+
+def _encode(poller_name: str, events: List[Dict[str, Any]]) -> bytes:
+    partial = {"descending": events.descending} if isinstance(events, PartialSnapshot) else None
+    payload = dump_json({"poller": poller_name, "events": events, "partial": partial}).encode("utf-8")
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode(payload: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+    frame = json.loads(payload)
+    poller_name, events, partial = frame["poller"], frame["events"], frame.get("partial")
+    if not isinstance(poller_name, str) or not isinstance(events, list):
+        raise ValueError("malformed shard frame")
+    if isinstance(partial, dict):
+        events = PartialSnapshot(events, bool(partial.get("descending")))
+    return poller_name, events
+
+
+async def _worker(config_path: str, shard: int, poller_names: List[str], socket_path: str, once: bool) -> None:
+    # Imported here: app builds the supervisor, and workers reuse app's poller construction.
+    from .app import build_pollers
+    from .scheduler import PollScheduler
+    from .transport import TransportManager
+
+    config = load_yaml_with_env(config_path)
+    poller_confs = config.get("pollers") or {}
+    config = {**config, "pollers": {name: poller_confs[name] for name in poller_names if name in poller_confs}}
+    transport = TransportManager(config.get("transport"))
+    pollers = build_pollers(config, transport)
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+
+    async def forward(poller_name: str, events: List[Dict[str, Any]]) -> None:
+        writer.write(_encode(poller_name, events))
+        await writer.drain()
+
+    scheduler = PollScheduler(config.get("scheduler"))
+    for name, poller in pollers.items():
+        conf = poller_confs.get(name) or {}
+        scheduler.add(
+            poller,
+            forward,
+            min_interval_seconds=conf.get("min_interval_seconds"),
+            max_interval_seconds=conf.get("max_interval_seconds"),
+        )
+    logger.info("Shard %d polling %s", shard, ", ".join(sorted(pollers)))
+    polling = asyncio.create_task(scheduler.run(once=once))
+    # The main process never writes; EOF means it is gone and this worker should stop too.
+    parent_gone = asyncio.create_task(reader.read())
+    try:
+        await asyncio.wait({polling, parent_gone}, return_when=asyncio.FIRST_COMPLETED)
+        if polling.done():
+            polling.result()
+    finally:
+        for task in (polling, parent_gone):
+            task.cancel()
+        await asyncio.gather(polling, parent_gone, return_exceptions=True)
+        writer.close()
+        await asyncio.gather(*[p.close() for p in pollers.values() if hasattr(p, "close")])
+        await transport.close()
+
+
+def run_worker(config_path: str, shard: int, poller_names: List[str], socket_path: str, once: bool) -> None:
+    configure_logging(logging.INFO)
+    try:
+        asyncio.run(_worker(config_path, shard, poller_names, socket_path, once))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardSupervisor:
+    # Runs pollers in worker processes and feeds their event batches into `submit` in this
+    # process, which keeps sole ownership of tracking, state and notifiers. Workers that die
+    # are restarted after `restart_delay_seconds`.
+    def __init__(
+        self,
+        config_path: str,
+        shards: Dict[int, List[str]],
+        submit: Submit,
+        socket_path: str,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        opts = {**DEFAULT_SHARDING, **(config or {})}
+        self.config_path = config_path
+        self.shards = shards
+        self.submit = submit
+        self.socket_path = socket_path
+        self.restart_delay_seconds = float(opts["restart_delay_seconds"])
+        self._ctx = mp.get_context("spawn")
+        self._processes: Dict[int, Any] = {}
+        self._connections: Set[asyncio.Task] = set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._connections.add(task)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_LENGTH.size)
+                    payload = await reader.readexactly(_LENGTH.unpack(header)[0])
+                except asyncio.IncompleteReadError:
+                    return
+                poller_name, events = _decode(payload)
+                EVENTS_TOTAL.labels(poller_name).inc(len(events))
+                # Backpressure: while submit waits, this socket is not read and the worker's drain() blocks.
+                await self.submit(poller_name, events)
+        except Exception as e:
+            logger.exception("Shard connection error: %s", e)
+        finally:
+            if task is not None:
+                self._connections.discard(task)
+            writer.close()
+
+    def _spawn(self, shard: int, once: bool) -> None:
+        process = self._ctx.Process(
+            target=run_worker,
+            args=(self.config_path, shard, self.shards[shard], self.socket_path, once),
+            name=f"tg-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard] = process
+
+    async def run(self, once: bool = False) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, self.socket_path)
+        # Only processes of this user may connect and feed events in.
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Sharding %d poller(s) across %d worker process(es)",
+                    sum(len(names) for names in self.shards.values()), len(self.shards))
+        try:
+            for shard in self.shards:
+                self._spawn(shard, once)
+            restart_at: Dict[int, float] = {}
+            loop = asyncio.get_running_loop()
+            while True:
+                await asyncio.sleep(0.2 if once else 1.0)
+                if once:
+                    if not any(p.is_alive() for p in self._processes.values()):
+                        # Finish reading what the workers sent before returning.
+                        if self._connections:
+                            await asyncio.gather(*self._connections, return_exceptions=True)
+                        return
+                    continue
+                for shard, process in list(self._processes.items()):
+                    if process.is_alive():
+                        continue
+                    if shard not in restart_at:
+                        logger.error("Shard %d exited with code %s, restarting in %.0fs",
+                                     shard, process.exitcode, self.restart_delay_seconds)
+                        restart_at[shard] = loop.time() + self.restart_delay_seconds
+                    elif loop.time() >= restart_at[shard]:
+                        del restart_at[shard]
+                        self._spawn(shard, once)
+        finally:
+            await self.close(server)
+
+    async def close(self, server: asyncio.AbstractServer) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            await asyncio.to_thread(process.join, 5)
+        server.close()
+        for task in tuple(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        await server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
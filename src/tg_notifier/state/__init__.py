@@ -1,3 +1,4 @@
 from .file_state import FileStateStore
+from .outbox import Outbox
 
-__all__ = ["FileStateStore"] 
\ No newline at end of file
+__all__ = ["FileStateStore", "Outbox"] 
\ No newline at end of file
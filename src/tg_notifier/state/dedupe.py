@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import struct
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+_MAGIC = b"TGDD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+_ENTRY = struct.Struct("<dH")
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# Seen-key set bounded by capacity and an optional TTL. Keys are ordered by when they were
+# last marked, so both eviction rules pop from the front. The Bloom filter cannot forget
+# keys, so it is rebuilt once evictions have degraded its false-positive rate.
+class DedupeStore:
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        ttl_seconds: Optional[float] = None,
+        bloom: bool = False,
+        bloom_error_rate: float = 0.01,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.ttl_seconds = ttl_seconds
+        self.bloom_error_rate = bloom_error_rate
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._bloom: Optional[BloomFilter] = BloomFilter(self.capacity, bloom_error_rate) if bloom else None
+        self._evicted_since_rebuild = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cutoff = now - self.ttl_seconds
+            while self._entries:
+                key, ts = next(iter(self._entries.items()))
+                if ts >= cutoff:
+                    break
+                self._entries.popitem(last=False)
+                self._evicted_since_rebuild += 1
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self._evicted_since_rebuild += 1
+        if self._bloom is not None and self._evicted_since_rebuild >= self.capacity:
+            self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> None:
+        self._bloom = BloomFilter(self.capacity, self.bloom_error_rate)
+        for key in self._entries:
+            self._bloom.add(key)
+        self._evicted_since_rebuild = 0
+
+    def contains(self, key: str, now: Optional[float] = None) -> bool:
+        if self._bloom is not None and key not in self._bloom:
+            return False
+        ts = self._entries.get(key)
+        if ts is None:
+            return False
+        if self.ttl_seconds is not None and ts < (now if now is not None else time.time()) - self.ttl_seconds:
+            return False
+        return True
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        if self._bloom is not None:
+            self._bloom.add(key)
+        self._expire(now)
+
+    def items(self) -> Iterable[Tuple[str, float]]:
+        return self._entries.items()
+
+    def to_bytes(self) -> bytes:
+        # Layout: header (magic, version, count) then per entry (timestamp f64, key length u16, utf-8 key).
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(self._entries))]
+        for key, ts in self._entries.items():
+            raw = key.encode("utf-8")[:0xFFFF]
+            parts.append(_ENTRY.pack(ts, len(raw)))
+            parts.append(raw)
+        return b"".join(parts)
+
+    def load_bytes(self, data: bytes) -> None:
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a dedupe snapshot")
+        offset = _HEADER.size
+        for _ in range(count):
+            ts, length = _ENTRY.unpack_from(data, offset)
+            offset += _ENTRY.size
+            key = data[offset:offset + length].decode("utf-8")
+            offset += length
+            self._entries[key] = ts
+            self._entries.move_to_end(key)
+        if self._bloom is not None:
+            self._rebuild_bloom()
+        self._expire(time.time())
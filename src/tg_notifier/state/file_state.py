@@ -1,116 +1,249 @@
 import asyncio
-import json
+import logging
 import os
-from typing import Dict, Set, Any, Optional
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
 
+from ..metrics import STATE_WRITE_SECONDS
 from ..utils import ensure_dir
+from .dedupe import DedupeStore
+from .journal import Journal, atomic_write_bytes, atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
 
 
 class FileStateStore:
-    def __init__(self, root_dir: str) -> None:
+    def __init__(
+        self,
+        root_dir: str,
+        compact_every: int = 500,
+        fsync_interval_seconds: float = 1.0,
+        dedupe_options: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
         self.root_dir = root_dir
         ensure_dir(self.root_dir)
+        self.compact_every = max(1, compact_every)
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.dedupe_options: Dict[str, Dict[str, Any]] = dedupe_options or {}
         self._locks: Dict[str, asyncio.Lock] = {}
-        self._seen_cache: Dict[str, Set[str]] = {}
+        self._journals: Dict[str, Journal] = {}
+        self._seen_cache: Dict[str, DedupeStore] = {}
         self._present_cache: Dict[str, Set[str]] = {}
+        self._tracking_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._live_messages: Optional[Dict[str, Dict[str, Any]]] = None
 
     def _file_path(self, poller_name: str) -> str:
+        # Legacy sorted-JSON seen list; migrated into the binary snapshot on first load.
         return os.path.join(self.root_dir, f"{poller_name}.json")
 
+    def _seen_file_path(self, poller_name: str) -> str:
+        return os.path.join(self.root_dir, f"{poller_name}.seen.bin")
+
     def _present_file_path(self, poller_name: str) -> str:
         return os.path.join(self.root_dir, f"{poller_name}__present.json")
 
     def _tracking_file_path(self, poller_name: str) -> str:
         return os.path.join(self.root_dir, f"{poller_name}__tracking.json")
 
+    def _live_messages_path(self) -> str:
+        return os.path.join(self.root_dir, "live_messages.json")
+
     def _get_lock(self, poller_name: str) -> asyncio.Lock:
         if poller_name not in self._locks:
             self._locks[poller_name] = asyncio.Lock()
         return self._locks[poller_name]
 
-    async def _load_seen(self, poller_name: str) -> Set[str]:
-        if poller_name in self._seen_cache:
-            return self._seen_cache[poller_name]
-        path = self._file_path(poller_name)
-        if not os.path.exists(path):
-            self._seen_cache[poller_name] = set()
-            return self._seen_cache[poller_name]
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._seen_cache[poller_name] = set(data if isinstance(data, list) else [])
-        except Exception:
-            self._seen_cache[poller_name] = set()
-        return self._seen_cache[poller_name]
+    @staticmethod
+    async def _timed_write(kind: str, fn: Callable[..., Any], *args: Any) -> None:
+        started = time.perf_counter()
+        await asyncio.to_thread(fn, *args)
+        STATE_WRITE_SECONDS.labels(kind).observe(time.perf_counter() - started)
+
+    def _journal(self, snapshot_path: str) -> Journal:
+        if snapshot_path not in self._journals:
+            journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+            self._journals[snapshot_path] = Journal(journal_path, self.fsync_interval_seconds)
+        return self._journals[snapshot_path]
+
+    # ---- Set snapshot + journal helpers (run in a worker thread) ----
+    def _load_set(self, snapshot_path: str) -> Set[str]:
+        data = read_json(snapshot_path)
+        result = set(data if isinstance(data, list) else [])
+        for record in self._journal(snapshot_path).replay():
+            if isinstance(record, dict):
+                result.update(record.get("add") or [])
+                result.difference_update(record.get("remove") or [])
+        return result
+
+    def _append_set_change(self, snapshot_path: str, values: Set[str], add: List[str], remove: List[str]) -> None:
+        journal = self._journal(snapshot_path)
+        record: Dict[str, List[str]] = {}
+        if add:
+            record["add"] = add
+        if remove:
+            record["remove"] = remove
+        journal.append(record)
+        if journal.records >= self.compact_every:
+            self._compact_set(snapshot_path, values)
+
+    def _compact_set(self, snapshot_path: str, values: Set[str]) -> None:
+        atomic_write_json(snapshot_path, sorted(values))
+        self._journal(snapshot_path).reset()
 
-    async def _persist_seen(self, poller_name: str) -> None:
-        path = self._file_path(poller_name)
-        ensure_dir(os.path.dirname(path))
-        data = sorted(self._seen_cache.get(poller_name, set()))
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+    # ---- Seen (dedupe) APIs ----
+    def _new_dedupe(self, poller_name: str) -> DedupeStore:
+        opts = self.dedupe_options.get(poller_name) or {}
+        ttl = opts.get("ttl_seconds")
+        return DedupeStore(
+            capacity=int(opts.get("capacity", 100_000)),
+            ttl_seconds=float(ttl) if ttl is not None else None,
+            bloom=bool(opts.get("bloom", False)),
+            bloom_error_rate=float(opts.get("bloom_error_rate", 0.01)),
+        )
+
+    def _read_dedupe(self, poller_name: str) -> DedupeStore:
+        store = self._new_dedupe(poller_name)
+        path = self._seen_file_path(poller_name)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    store.load_bytes(f.read())
+            except Exception:
+                logger.warning("Ignoring unreadable seen snapshot %s", path)
+        else:
+            now = time.time()
+            for key in sorted(self._load_set(self._file_path(poller_name))):
+                store.add(str(key), now)
+        for record in self._journal(path).replay():
+            if isinstance(record, dict):
+                ts = record.get("ts")
+                for key in record.get("add") or []:
+                    store.add(key, ts)
+        return store
+
+    def _write_dedupe(self, poller_name: str, data: bytes) -> None:
+        atomic_write_bytes(self._seen_file_path(poller_name), data)
+        self._journal(self._seen_file_path(poller_name)).reset()
+        legacy = self._file_path(poller_name)
+        self._journal(legacy).reset()
+        self._journals.pop(legacy, None)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+    async def _load_seen(self, poller_name: str) -> DedupeStore:
+        if poller_name not in self._seen_cache:
+            self._seen_cache[poller_name] = await asyncio.to_thread(self._read_dedupe, poller_name)
+        return self._seen_cache[poller_name]
 
     async def is_seen(self, poller_name: str, key: str) -> bool:
         async with self._get_lock(poller_name):
             seen = await self._load_seen(poller_name)
-            return key in seen
+            return seen.contains(key)
 
     async def mark_seen(self, poller_name: str, keys: Set[str]) -> None:
         async with self._get_lock(poller_name):
             seen = await self._load_seen(poller_name)
-            seen.update(keys)
-            await self._persist_seen(poller_name)
+            now = time.time()
+            new_keys = sorted(k for k in keys if not seen.contains(k, now))
+            if not new_keys:
+                return
+            for key in new_keys:
+                seen.add(key, now)
+            journal = self._journal(self._seen_file_path(poller_name))
+            await self._timed_write("seen_journal", journal.append, {"add": new_keys, "ts": now})
+            if journal.records >= self.compact_every:
+                # Serialize on the loop so the worker thread never reads a store being mutated.
+                await self._timed_write("seen_snapshot", self._write_dedupe, poller_name, seen.to_bytes())
+
+    # ---- Content fingerprint APIs ----
+    @staticmethod
+    def fingerprint_store_name(poller_name: str) -> str:
+        # Fingerprints live in their own dedupe store; its dedupe_options entry sets the window (ttl_seconds).
+        return f"{poller_name}__fp"
+
+    async def seen_fingerprints(self, poller_name: str, fingerprints: Iterable[str]) -> Set[str]:
+        name = self.fingerprint_store_name(poller_name)
+        async with self._get_lock(name):
+            store = await self._load_seen(name)
+            now = time.time()
+            return {fp for fp in fingerprints if store.contains(fp, now)}
+
+    async def mark_fingerprints(self, poller_name: str, fingerprints: Set[str]) -> None:
+        await self.mark_seen(self.fingerprint_store_name(poller_name), fingerprints)
 
     # ---- Present snapshot APIs ----
     async def load_last_present_ids(self, poller_name: str) -> Set[str]:
         async with self._get_lock(poller_name):
-            if poller_name in self._present_cache:
-                return self._present_cache[poller_name]
-            path = self._present_file_path(poller_name)
-            if not os.path.exists(path):
-                self._present_cache[poller_name] = set()
-                return self._present_cache[poller_name]
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                self._present_cache[poller_name] = set(data if isinstance(data, list) else [])
-            except Exception:
-                self._present_cache[poller_name] = set()
+            if poller_name not in self._present_cache:
+                path = self._present_file_path(poller_name)
+                self._present_cache[poller_name] = await asyncio.to_thread(self._load_set, path)
             return self._present_cache[poller_name]
 
     async def save_current_present_ids(self, poller_name: str, ids: Set[str]) -> None:
         async with self._get_lock(poller_name):
-            self._present_cache[poller_name] = set(ids)
             path = self._present_file_path(poller_name)
-            ensure_dir(os.path.dirname(path))
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(sorted(list(ids)), f, ensure_ascii=False)
+            if poller_name not in self._present_cache:
+                self._present_cache[poller_name] = await asyncio.to_thread(self._load_set, path)
+            previous = self._present_cache[poller_name]
+            current = set(ids)
+            add = sorted(current - previous)
+            remove = sorted(previous - current)
+            self._present_cache[poller_name] = current
+            if add or remove:
+                await self._timed_write("present_journal", self._append_set_change, path, set(current), add, remove)
 
     # ---- Tracking lowest order APIs ----
     async def load_tracking(self, poller_name: str) -> Optional[Dict[str, Any]]:
         async with self._get_lock(poller_name):
-            path = self._tracking_file_path(poller_name)
-            if not os.path.exists(path):
-                return None
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-            except Exception:
-                return None
-            return None
+            if poller_name not in self._tracking_cache:
+                data = await asyncio.to_thread(read_json, self._tracking_file_path(poller_name))
+                self._tracking_cache[poller_name] = data if isinstance(data, dict) else None
+            data = self._tracking_cache[poller_name]
+            return dict(data) if data is not None else None
+
+    def _write_tracking(self, path: str, data: Optional[Dict[str, Any]]) -> None:
+        if data is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        atomic_write_json(path, data)
 
     async def save_tracking(self, poller_name: str, data: Optional[Dict[str, Any]]) -> None:
         async with self._get_lock(poller_name):
-            path = self._tracking_file_path(poller_name)
-            ensure_dir(os.path.dirname(path))
-            if data is None:
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except Exception:
-                    pass
-                return
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False) 
\ No newline at end of file
+            # The tracking record is a handful of fields, so an atomic snapshot is cheaper than a journal.
+            self._tracking_cache[poller_name] = dict(data) if data is not None else None
+            await self._timed_write("tracking", self._write_tracking, self._tracking_file_path(poller_name), data)
+
+    # ---- Live (edited in place) message APIs ----
+    async def _load_live_messages(self) -> Dict[str, Dict[str, Any]]:
+        if self._live_messages is None:
+            data = await asyncio.to_thread(read_json, self._live_messages_path())
+            self._live_messages = data if isinstance(data, dict) else {}
+        return self._live_messages
+
+    async def load_live_message(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self._get_lock("__live__"):
+            record = (await self._load_live_messages()).get(key)
+            return dict(record) if isinstance(record, dict) else None
+
+    async def save_live_message(self, key: str, record: Optional[Dict[str, Any]]) -> None:
+        # One small file for all live messages; they change at most once per debounce window.
+        async with self._get_lock("__live__"):
+            records = await self._load_live_messages()
+            if record is None:
+                records.pop(key, None)
+            else:
+                records[key] = dict(record)
+            await self._timed_write("live_message", atomic_write_json, self._live_messages_path(), dict(records))
+
+    async def close(self) -> None:
+        # Fold every journal into its snapshot so the next start loads one file per kind.
+        for poller_name, seen in list(self._seen_cache.items()):
+            if self._journal(self._seen_file_path(poller_name)).records:
+                await asyncio.to_thread(self._write_dedupe, poller_name, seen.to_bytes())
+        seen_paths = {self._seen_file_path(name) for name in self._seen_cache}
+        for snapshot_path, journal in list(self._journals.items()):
+            if journal.records and snapshot_path not in seen_paths:
+                values = await asyncio.to_thread(self._load_set, snapshot_path)
+                await asyncio.to_thread(self._compact_set, snapshot_path, values)
+            await asyncio.to_thread(journal.close)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import IO, Any, List, Optional
+
+from ..utils import dump_json, ensure_dir
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    # Write-to-temp, fsync, rename: readers see either the old file or the new one, never a torn write.
+    ensure_dir(os.path.dirname(path) or ".")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def read_json(path: str) -> Any:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        logger.warning("Ignoring unreadable state file %s", path)
+        return None
+
+
+# Append-only JSON-lines log replayed on top of a snapshot. fsyncs are batched: a record is
+# fsynced at most fsync_interval_seconds after it was appended, by the next append or by a
+# deadline timer. Appends run in worker threads (asyncio.to_thread), hence a thread timer and lock.
+class Journal:
+    def __init__(self, path: str, fsync_interval_seconds: float = 1.0) -> None:
+        self.path = path
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.records = 0
+        self._fh: Optional[IO[str]] = None
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def replay(self) -> List[Any]:
+        records: List[Any] = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A crash mid-append leaves at most one torn trailing line.
+                    logger.warning("Skipping torn record in %s", self.path)
+        self.records = len(records)
+        return records
+
+    def _ends_torn(self) -> bool:
+        # Terminate a torn trailing line so the next record does not get glued onto it.
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def append(self, record: Any) -> None:
+        with self._lock:
+            if self._fh is None:
+                ensure_dir(os.path.dirname(self.path) or ".")
+                self._fh = open(self.path, "a", encoding="utf-8")
+                if self._ends_torn():
+                    self._fh.write("\n")
+            self._fh.write(dump_json(record) + "\n")
+            self._fh.flush()
+            self.records += 1
+            self._dirty = True
+            remaining = self.fsync_interval_seconds - (time.monotonic() - self._last_sync)
+            if remaining <= 0:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(remaining, self._deadline)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _deadline(self) -> None:
+        with self._lock:
+            # A sync since this timer was armed has already replaced or cleared it.
+            if self._timer is threading.current_thread():
+                self._timer = None
+                self._sync()
+
+    def _sync(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._fh is not None and self._dirty:
+            os.fsync(self._fh.fileno())
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def reset(self) -> None:
+        # Called after the snapshot that absorbed these records has been atomically replaced.
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.records = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
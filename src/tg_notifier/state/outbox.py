@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..metrics import STATE_WRITE_SECONDS
+from ..utils import ensure_dir
+from .journal import Journal, atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+OutboxEntry = Tuple[str, Any]
+
+
+def message_record(message: Any) -> Dict[str, Any]:
+    # Everything needed to resend an OutboundMessage after a restart.
+    d = message.delivery
+    return {
+        "poller": message.poller_name,
+        "route": getattr(message.route, "name", None),
+        "notifier": d.notifier_name,
+        "chat_id": d.chat_id,
+        "parse_mode": d.parse_mode,
+        "coalesce": d.coalesce,
+        "live": d.live,
+        "text": message.text,
+    }
+
+
+def idempotency_key(seq: int, index: int, record: Dict[str, Any]) -> str:
+    h = hashlib.blake2b(digest_size=10)
+    for part in (seq, index, record["poller"], record["route"], record["notifier"], record["chat_id"], record["text"]):
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# Durable queue of rendered messages: `.state/outbox.json` snapshot + `.state/outbox.journal`.
+# A commit record carries a poller's new tracking state together with the messages it
+# produced, so one fsynced line makes both durable. The tracking file is written after it;
+# load() re-applies journaled tracking in case the process died in between. Trackings not yet
+# written are carried into compacted snapshots, since compaction drops their journal lines.
+class Outbox:
+    def __init__(
+        self,
+        root_dir: str,
+        state: Any,
+        compact_every: int = 200,
+        fsync_interval_seconds: float = 1.0,
+    ) -> None:
+        self.root_dir = root_dir
+        ensure_dir(root_dir)
+        self.state = state
+        self.compact_every = max(1, compact_every)
+        self.snapshot_path = os.path.join(root_dir, "outbox.json")
+        self.journal = Journal(os.path.join(root_dir, "outbox.journal"), fsync_interval_seconds)
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+        self._seq = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        data = read_json(self.snapshot_path) or {}
+        self._seq = int(data.get("seq", 0))
+        for record in data.get("pending") or []:
+            self.pending[record["id"]] = record
+        trackings: Dict[str, Dict[str, Any]] = dict(data.get("trackings") or {})
+        for record in self.journal.replay():
+            if not isinstance(record, dict):
+                continue
+            if record.get("op") == "commit":
+                self._seq = max(self._seq, int(record.get("seq", 0)))
+                for message in record.get("messages") or []:
+                    self.pending.setdefault(message["id"], message)
+                if record.get("tracking") is not None:
+                    trackings[record["poller"]] = record["tracking"]
+            elif record.get("op") == "ack":
+                for key in record.get("ids") or []:
+                    self.pending.pop(key, None)
+        return trackings
+
+    async def load(self) -> List[Dict[str, Any]]:
+        # Returns the messages still owed from a previous run, oldest first.
+        async with self._lock:
+            trackings = await asyncio.to_thread(self._read)
+        for poller_name, tracking in trackings.items():
+            await self.state.save_tracking(poller_name, tracking)
+        if self.pending:
+            logger.info("Outbox: replaying %d pending message(s)", len(self.pending))
+        return list(self.pending.values())
+
+    def _append(self, record: Dict[str, Any], durable: bool) -> None:
+        started = time.perf_counter()
+        self.journal.append(record)
+        if durable:
+            self.journal.sync()
+        kind = "outbox_commit" if durable else "outbox_ack"
+        STATE_WRITE_SECONDS.labels(kind).observe(time.perf_counter() - started)
+
+    def _compact(self, snapshot: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        atomic_write_json(self.snapshot_path, snapshot)
+        self.journal.reset()
+        STATE_WRITE_SECONDS.labels("outbox_snapshot").observe(time.perf_counter() - started)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {"seq": self._seq, "pending": list(self.pending.values()), "trackings": dict(self._unsaved)}
+
+    async def _maybe_compact(self) -> None:
+        if self.journal.records >= self.compact_every:
+            await asyncio.to_thread(self._compact, self._snapshot())
+
+    async def commit(
+        self, poller_name: str, tracking: Optional[Dict[str, Any]], messages: List[Any]
+    ) -> List[OutboxEntry]:
+        async with self._lock:
+            self._seq += 1
+            records = []
+            for i, message in enumerate(messages):
+                record = message_record(message)
+                record["id"] = idempotency_key(self._seq, i, record)
+                records.append(record)
+            if records or tracking is not None:
+                entry = {"op": "commit", "seq": self._seq, "poller": poller_name, "tracking": tracking, "messages": records}
+                await asyncio.to_thread(self._append, entry, True)
+            for record in records:
+                self.pending[record["id"]] = record
+            if tracking is not None:
+                self._unsaved[poller_name] = tracking
+            await self._maybe_compact()
+        if tracking is not None:
+            await self.state.save_tracking(poller_name, tracking)
+            if self._unsaved.get(poller_name) is tracking:
+                del self._unsaved[poller_name]
+        return [(record["id"], message) for record, message in zip(records, messages)]
+
+    async def ack(self, ids: List[str]) -> None:
+        # Acks are not fsynced: losing one only means a resend, which at-least-once allows.
+        ids = [key for key in ids if key in self.pending]
+        if not ids:
+            return
+        async with self._lock:
+            for key in ids:
+                self.pending.pop(key, None)
+            await asyncio.to_thread(self._append, {"op": "ack", "ids": ids}, False)
+            await self._maybe_compact()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self.journal.records or os.path.exists(self.journal.path):
+                await asyncio.to_thread(self._compact, self._snapshot())
+            await asyncio.to_thread(self.journal.close)
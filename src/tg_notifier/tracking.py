@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+from .orderbook import OrderBook, to_price
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+# Alert kinds missing from a poller's tracking.templates render with the route's delivery template.
+DEFAULT_LOWEST_TEMPLATES: Dict[str, Optional[str]] = {
+    "new_lowest": None,
+    "lower": None,
+    "removed": None,
+    # The tracked offer disappeared and nothing is listed any more: no new_* fields.
+    "gone": None,
+}
+
+
+class TrackResult(NamedTuple):
+    alerts: List[Event]
+    # New tracking state, persisted together with the alerts' messages; None leaves it as is.
+    tracking: Optional[Dict[str, Any]] = None
+
+
+class TrackingStrategy:
+    # Turns each fresh snapshot of one poller into the alert events to route.
+    # Strategies keep their own view of the tracking state; the pipeline persists it.
+    def __init__(self, poller_name: str, conf: Dict[str, Any]) -> None:
+        self.poller_name = poller_name
+        self.conf = conf
+
+    async def update(self, events: List[Event], state: Any) -> TrackResult:
+        raise NotImplementedError
+
+
+class ForwardStrategy(TrackingStrategy):
+    # Routes offers one by one. Snapshots are diffed against the previous one, so only new offers
+    # (plus changed ones with `changed: true`) are routed; pushed deltas pass through as-is.
+    def __init__(self, poller_name: str, conf: Dict[str, Any]) -> None:
+        super().__init__(poller_name, conf)
+        self.snapshot = bool(conf.get("snapshot", True))
+        self.include_changed = bool(conf.get("changed", False))
+        self.book = OrderBook(conf.get("key") or "price")
+
+    async def update(self, events: List[Event], state: Any) -> TrackResult:
+        if not self.snapshot:
+            return TrackResult(events)
+        diff = self.book.apply_snapshot(events)
+        return TrackResult(diff.added + diff.changed if self.include_changed else diff.added)
+
+
+class LowestPriceStrategy(TrackingStrategy):
+    # Follows the lowest offer: alerts when tracking starts, when the tracked offer disappears
+    # (sold or cancelled) and when a strictly lower offer appears while it is still listed.
+    def __init__(self, poller_name: str, conf: Dict[str, Any]) -> None:
+        super().__init__(poller_name, conf)
+        self.key: str = conf.get("key") or "price"
+        self.templates = {**DEFAULT_LOWEST_TEMPLATES, **(conf.get("templates") or {})}
+        self.book = OrderBook(self.key)
+        self.tracking: Optional[Dict[str, Any]] = None
+        self._loaded = False
+
+    def _tracking_of(self, event: Event) -> Dict[str, Any]:
+        tracking = {k: v for k, v in event.items() if not k.startswith("__")}
+        tracking["id"] = event.get("__id__") or event.get("id") or self.book.id_of(event)
+        tracking["price"] = event.get(self.key)
+        if event.get("__fp__"):
+            tracking["fp"] = event["__fp__"]
+        return tracking
+
+    def _alert(self, event: Event, template_name: str) -> Event:
+        # Copy so alert-only keys never leak into the book's stored snapshot.
+        alert = dict(event)
+        alert["id"] = event.get("__id__") or event.get("id") or self.book.id_of(event)
+        template = self.templates.get(template_name)
+        if template:
+            alert["__template__"] = template
+        return alert
+
+    async def update(self, events: List[Event], state: Any) -> TrackResult:
+        # Diff against the previous snapshot; the book answers lowest/presence in O(log n).
+        diff = self.book.apply_snapshot(events)
+        logger.debug(
+            "Poller %s book: +%d -%d ~%d", self.poller_name, len(diff.added), len(diff.removed), len(diff.changed)
+        )
+        current_lowest = self.book.best()
+        if not self._loaded:
+            self.tracking = await state.load_tracking(self.poller_name)
+            self._loaded = True
+        tracking = self.tracking
+
+        if current_lowest is None:
+            # Empty snapshot (nothing listed, or everything filtered out): the tracked offer is gone
+            # and there is no new lowest. An empty record restarts tracking at the next offer.
+            if not tracking:
+                return TrackResult([])
+            alert = dict(tracking)
+            template = self.templates.get("gone")
+            if template:
+                alert["__template__"] = template
+            self.tracking = {}
+            return TrackResult([alert], {})
+        if not tracking:
+            alerts = [self._alert(current_lowest, "new_lowest")]
+        elif str(tracking.get("id")) not in self.book and self.book.covers(to_price(tracking.get("price"))):
+            # Past an early-stopped scan's last price the offer was not fetched, not removed.
+            if tracking.get("fp") and tracking.get("fp") == current_lowest.get("__fp__"):
+                # Same terms re-listed under a new ID: follow it silently.
+                self.tracking = self._tracking_of(current_lowest)
+                return TrackResult([], dict(self.tracking))
+            # Tracked order eaten/removed -> previous fields plus new_<field> for the new lowest.
+            alert = dict(tracking)
+            for k, v in self._tracking_of(current_lowest).items():
+                alert[f"new_{k}"] = v
+            # `new_total` is the placeholder name older templates use for the new total_amount.
+            alert.setdefault("new_total", alert.get("new_total_amount"))
+            template = self.templates.get("removed")
+            if template:
+                alert["__template__"] = template
+            alerts = [alert]
+        elif to_price(current_lowest.get(self.key)) < to_price(tracking.get("price")):
+            alerts = [self._alert(current_lowest, "lower")]
+        else:
+            return TrackResult([])
+        self.tracking = self._tracking_of(current_lowest)
+        return TrackResult(alerts, dict(self.tracking))
+
+
+STRATEGIES: Dict[str, Type[TrackingStrategy]] = {
+    "lowest_price": LowestPriceStrategy,
+    "forward": ForwardStrategy,
+}
+
+
+def build_strategy(poller_name: str, conf: Dict[str, Any]) -> TrackingStrategy:
+    # conf is the poller's config block; tracking.key defaults to post_process.pick.key.
+    tracking = dict(conf.get("tracking") or {})
+    type_ = tracking.get("type", "lowest_price")
+    strategy = STRATEGIES.get(type_)
+    if strategy is None:
+        raise ValueError(f"Unknown tracking type for poller {poller_name}: {type_}")
+    if not tracking.get("key"):
+        tracking["key"] = ((conf.get("post_process") or {}).get("pick") or {}).get("key")
+    return strategy(poller_name, tracking)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORT: Dict[str, Any] = {
+    "http2": False,
+    "timeout_seconds": 15,
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry_seconds": 30,
+}
+
+
+class TransportManager:
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        config = config or {}
+        self.defaults = {**DEFAULT_TRANSPORT, **{k: v for k, v in config.items() if k != "hosts"}}
+        self.hosts: Dict[str, Dict[str, Any]] = config.get("hosts") or {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._http2_available = importlib.util.find_spec("h2") is not None
+
+    def options_for(self, host: str) -> Dict[str, Any]:
+        return {**self.defaults, **(self.hosts.get(host) or {})}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        host = httpx.URL(url).host
+        client = self._clients.get(host)
+        if client is None:
+            opts = self.options_for(host)
+            http2 = bool(opts.get("http2"))
+            if http2 and not self._http2_available:
+                logger.warning("HTTP/2 requested for %s but the h2 package is not installed; using HTTP/1.1", host)
+                http2 = False
+            client = httpx.AsyncClient(
+                http2=http2,
+                timeout=float(opts["timeout_seconds"]),
+                limits=httpx.Limits(
+                    max_connections=int(opts["max_connections"]),
+                    max_keepalive_connections=int(opts["max_keepalive_connections"]),
+                    keepalive_expiry=float(opts["keepalive_expiry_seconds"]),
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
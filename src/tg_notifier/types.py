@@ -20,27 +20,50 @@ class HTTPJSONExtractConfig(BaseModel):
 class PollerHTTPJSONConfig(BaseModel):
     type: str = "http_json"
     interval_seconds: int = 15
+    min_interval_seconds: Optional[float] = None
+    max_interval_seconds: Optional[float] = None
     request: HTTPRequestConfig
     extract: HTTPJSONExtractConfig
     id_path: Optional[str] = None
     updated_at_path: Optional[str] = None
     fields: Dict[str, str] = Field(default_factory=dict)
+    keep_raw: bool = False
+    tracking: Dict[str, Any] = Field(default_factory=dict)
+    shard: Optional[int] = None
 
 
 class NotifierTelegramConfig(BaseModel):
     type: str = "telegram"
     token: str
     default_parse_mode: Optional[str] = None
+    rate_limits: Dict[str, float] = Field(default_factory=dict)
+    max_retries: int = 5
+    api_base_url: Optional[str] = None
+
+
+class NotifierSinkConfig(BaseModel):
+    type: str = "sink"
+    path: Optional[str] = None
 
 
 class DeliveryConfig(BaseModel):
     notifier: str
     chat_id: str | int
     template: str
+    parse_mode: Optional[str] = None
+    coalesce: bool | Dict[str, Any] = False
+    live: bool | Dict[str, Any] = False
 
 
 class RouteMatch(BaseModel):
     poller_name: Optional[str] = None
+    poller_regex: Optional[str] = None
+    where: Dict[str, Any] = Field(default_factory=dict)
+    where_in: Dict[str, List[Any]] = Field(default_factory=dict)
+    where_gte: Dict[str, float] = Field(default_factory=dict)
+    where_lte: Dict[str, float] = Field(default_factory=dict)
+    where_range: Dict[str, List[Optional[float]]] = Field(default_factory=dict)
+    where_regex: Dict[str, str] = Field(default_factory=dict)
 
 
 class RouteConfig(BaseModel):
@@ -1,8 +1,11 @@
 import os
 import re
 import json
+import hashlib
 import logging
-from typing import Any, Dict, Optional
+import string
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import yaml
 from decimal import Decimal, ROUND_HALF_UP
@@ -41,6 +44,36 @@ def get_by_path(data: Any, path: Optional[str]) -> Any:
     return cur
 
 
+def compile_path(path: Optional[str]) -> Callable[[Any], Any]:
+    # Same semantics as get_by_path, but the dotted path is split once up front.
+    if path is None or path == "":
+        return lambda data: data
+    parts = tuple(path.split("."))
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda data: data.get(key) if isinstance(data, dict) else None
+
+    def getter(data: Any) -> Any:
+        cur = data
+        for part in parts:
+            if isinstance(cur, dict):
+                cur = cur.get(part)
+            else:
+                return None
+        return cur
+    return getter
+
+
+def compile_fingerprint(fields: List[str]) -> Callable[[Dict[str, Any]], str]:
+    # Stable across processes (unlike hash()), so fingerprints can be persisted; repr keeps 1 and "1" apart.
+    keys = tuple(fields)
+
+    def fingerprint(event: Dict[str, Any]) -> str:
+        data = repr(tuple(event.get(k) for k in keys)).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+    return fingerprint
+
+
 class SafeFormatDict(dict):
     def __missing__(self, key):  # type: ignore[override]
         return ""
@@ -87,11 +120,52 @@ def format_number_2dp_no_sci(value: Any) -> str:
     return s
 
 
+@lru_cache(maxsize=4096, typed=True)
+def _format_number_cached(value: Any) -> str:
+    return format_number_2dp_no_sci(value)
+
+
+def format_number_value(value: Any) -> Any:
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return _format_number_cached(value)
+    return value
+
+
 def format_numbers_in_mapping(mapping: Dict[str, Any]) -> Dict[str, Any]:
-    formatted: Dict[str, Any] = {}
-    for k, v in mapping.items():
-        if isinstance(v, (int, float, Decimal)) and not isinstance(v, bool):
-            formatted[k] = format_number_2dp_no_sci(v)
-        else:
-            formatted[k] = v
-    return formatted 
\ No newline at end of file
+    return {k: format_number_value(v) for k, v in mapping.items()}
+
+
+class CompiledTemplate:
+    # Parsed once: render() formats only the fields the template references, with the same
+    # output as render_template(template, format_numbers_in_mapping(mapping)).
+    def __init__(self, template: str) -> None:
+        self.template = template
+        fields = []
+        try:
+            for _, field_name, _, _ in string.Formatter().parse(template):
+                if field_name:
+                    root = re.split(r"[.\[]", field_name, maxsplit=1)[0]
+                    if root and root not in fields:
+                        fields.append(root)
+            self.valid = True
+        except ValueError:
+            self.valid = False
+        self.fields: Tuple[str, ...] = tuple(fields)
+
+    def render(self, mapping: Dict[str, Any]) -> str:
+        if not self.valid:
+            return self.template
+        safe = SafeFormatDict()
+        for k in self.fields:
+            if k in mapping:
+                v = mapping[k]
+                safe[k] = "" if v is None else format_number_value(v)
+        try:
+            return self.template.format_map(safe)
+        except Exception:
+            return self.template
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template) 
\ No newline at end of file
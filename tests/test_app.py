@@ -0,0 +1,17 @@
+from tg_notifier.app import build_dedupe_options
+
+
+def test_dedupe_block_tunes_the_fingerprint_store() -> None:
+    options = build_dedupe_options(
+        {
+            "pollers": {
+                "a": {
+                    "post_process": {"dedupe_key_fields": ["price"], "dedupe_window_seconds": 60},
+                    "dedupe": {"capacity": 500, "bloom": True},
+                },
+                # Without fingerprint fields there is no seen-key store to tune.
+                "b": {"dedupe": {"capacity": 500}},
+            }
+        }
+    )
+    assert options == {"a__fp": {"ttl_seconds": 60.0, "capacity": 500, "bloom": True}}
@@ -0,0 +1,29 @@
+import os
+import time
+
+from tg_notifier.state import journal as journal_module
+from tg_notifier.state.journal import Journal
+
+
+def test_last_record_is_fsynced_by_deadline(tmp_path, monkeypatch) -> None:
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(journal_module.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+
+    j = Journal(str(tmp_path / "x.journal"), fsync_interval_seconds=0.05)
+    j.append({"n": 1})
+    assert not synced
+    deadline = time.monotonic() + 2
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(synced) == 1
+    j.close()
+    assert j.replay() == [{"n": 1}]
+
+
+def test_close_cancels_pending_deadline(tmp_path) -> None:
+    j = Journal(str(tmp_path / "x.journal"), fsync_interval_seconds=60)
+    j.append({"n": 1})
+    assert j._timer is not None
+    j.close()
+    assert j._timer is None
@@ -0,0 +1,59 @@
+import json
+from typing import Any, List, Tuple
+
+from tg_notifier.pollers.jsonstream import JSONItemStream, is_streamable_path
+
+
+def _stream(path: str, body: bytes, size: int) -> Tuple[JSONItemStream, List[Any]]:
+    parser = JSONItemStream(path)
+    items: List[Any] = []
+    for start in range(0, len(body), size):
+        items.extend(parser.feed(body[start:start + size]))
+    return parser, items
+
+
+def _items(path: str, doc: Any) -> List[List[Any]]:
+    # The same document cut into every chunk size from 1 to 7 bytes.
+    body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+    return [_stream(path, body, size)[1] for size in range(1, 8)]
+
+
+def test_escapes_and_quotes_split_across_chunks() -> None:
+    items = [
+        {"s": 'a"b\\', "t": "]},{\"k\":", "u": "é\n"},
+        {"s": "\\\\\"", "n": [1, {"x": "}"}]},
+        "plain \"string\" item",
+    ]
+    for got in _items("data.list", {"data": {"list": items}}):
+        assert got == items
+
+
+def test_key_with_the_target_name_elsewhere_is_ignored() -> None:
+    doc = {
+        "other": {"data": {"list": [0]}},
+        "data": {"meta": {"list": [9]}, "note": "list", "list": [{"list": [1]}, 2]},
+    }
+    for got in _items("data.list", doc):
+        assert got == [{"list": [1]}, 2]
+
+
+def test_empty_array() -> None:
+    body = b'{"data": {"list": []}, "total": 0}'
+    for size in range(1, 8):
+        parser, items = _stream("data.list", body, size)
+        assert items == []
+        assert parser.found and parser.done
+
+
+def test_non_array_target_yields_nothing() -> None:
+    body = b'{"data": {"list": {"id": 1}}}'
+    for size in range(1, 8):
+        parser, items = _stream("data.list", body, size)
+        assert items == []
+        assert not parser.found
+
+
+def test_streamable_paths() -> None:
+    assert is_streamable_path("data.list")
+    assert not is_streamable_path("data.list[0]")
+    assert not is_streamable_path("")
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from tg_notifier.routing.router import Delivery, OutboundMessage
+from tg_notifier.state.outbox import Outbox
+
+
+class CrashingState:
+    # Dies on the tracking write, like a process killed right after the commit record.
+    def __init__(self, crash: bool) -> None:
+        self.crash = crash
+        self.saved: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    async def save_tracking(self, poller_name: str, data: Optional[Dict[str, Any]]) -> None:
+        if self.crash:
+            raise RuntimeError("killed")
+        self.saved[poller_name] = data
+
+
+def _message(text: str) -> OutboundMessage:
+    delivery = Delivery({"notifier": "sink", "chat_id": 1, "template": "{id}"}, None)
+    return OutboundMessage("p", None, delivery, text)
+
+
+def test_tracking_survives_compaction_before_it_is_saved(tmp_path) -> None:
+    async def scenario() -> None:
+        outbox = Outbox(str(tmp_path), CrashingState(crash=True), compact_every=1)
+        try:
+            await outbox.commit("p", {"id": "a", "price": 2.0}, [_message("hello")])
+        except RuntimeError:
+            pass
+        # Compaction already dropped the commit record from the journal.
+        assert outbox.journal.records == 0
+
+        state = CrashingState(crash=False)
+        pending = await Outbox(str(tmp_path), state).load()
+        assert state.saved == {"p": {"id": "a", "price": 2.0}}
+        assert [m["text"] for m in pending] == ["hello"]
+
+    asyncio.run(scenario())
+
+
+def test_saved_tracking_is_not_reapplied_from_snapshot(tmp_path) -> None:
+    async def scenario() -> None:
+        outbox = Outbox(str(tmp_path), CrashingState(crash=False), compact_every=1)
+        await outbox.commit("p", {"id": "a"}, [])
+        await outbox.commit("q", None, [_message("x")])
+        await outbox.close()
+
+        state = CrashingState(crash=False)
+        await Outbox(str(tmp_path), state).load()
+        assert state.saved == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+import pytest
+
+from tg_notifier.orderbook import PartialSnapshot
+from tg_notifier.sharding import _LENGTH, _decode, _encode
+
+
+def _roundtrip(events):
+    frame = _encode("p", events)
+    assert _LENGTH.unpack(frame[:_LENGTH.size])[0] == len(frame) - _LENGTH.size
+    return _decode(frame[_LENGTH.size:])
+
+
+def test_frames_round_trip_events_and_the_partial_flag() -> None:
+    events = [{"__id__": "a", "price": 1.5, "__raw__": {"nested": [1, None, "é"]}}]
+    name, full = _roundtrip(events)
+    assert name == "p" and full == events and not isinstance(full, PartialSnapshot)
+
+    _, partial = _roundtrip(PartialSnapshot(events, descending=True))
+    assert isinstance(partial, PartialSnapshot) and partial.descending and partial == events
+
+
+def test_malformed_frames_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        _decode(b'{"poller": "p", "events": {"a": 1}}')
+    with pytest.raises(ValueError):
+        _decode(b"\x80\x05not json")
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from tg_notifier.notifiers.sink import SinkNotifier
+from tg_notifier.orderbook import PartialSnapshot
+from tg_notifier.routing.router import Router
+from tg_notifier.tracking import ForwardStrategy, LowestPriceStrategy
+
+
+class MemoryState:
+    def __init__(self) -> None:
+        self.tracking: Optional[Dict[str, Any]] = None
+
+    async def load_tracking(self, poller_name: str) -> Optional[Dict[str, Any]]:
+        return self.tracking
+
+
+def _offer(order_id: str, price: float) -> Dict[str, Any]:
+    return {"__id__": order_id, "price": price}
+
+
+def _render(alerts: List[Dict[str, Any]]) -> List[str]:
+    router = Router(
+        {"sink": SinkNotifier()},
+        [{"name": "r", "match": {"poller_name": "p"}, "deliveries": [{"notifier": "sink", "chat_id": 1, "template": "{id} {price}"}]}],
+    )
+    return [m.text for m in router.render_messages("p", alerts)]
+
+
+def test_empty_snapshot_reports_removal_and_restarts_tracking() -> None:
+    async def scenario() -> None:
+        templates = {"removed": "{price} gone, now {new_price}", "gone": "{price} gone, nothing listed"}
+        strategy = LowestPriceStrategy("p", {"key": "price", "templates": templates})
+        state = MemoryState()
+
+        first = await strategy.update([_offer("a", 2.0), _offer("b", 3.0)], state)
+        assert first.tracking is not None and first.tracking["id"] == "a"
+
+        empty = await strategy.update([], state)
+        assert _render(empty.alerts) == ["2 gone, nothing listed"]
+        assert empty.tracking == {}
+        assert "a" not in strategy.book
+
+        # Still empty: nothing more to report.
+        assert await strategy.update([], state) == ([], None)
+
+        relisted = await strategy.update([_offer("c", 4.0)], state)
+        assert relisted.tracking is not None and relisted.tracking["id"] == "c"
+        assert _render(relisted.alerts) == ["c 4"]
+
+    asyncio.run(scenario())
+
+
+def test_removed_alert_keeps_placeholders_and_route_template() -> None:
+    async def scenario() -> None:
+        strategy = LowestPriceStrategy("p", {"key": "price"})
+        state = MemoryState()
+        await strategy.update([{"__id__": "a", "price": 2.0, "total_amount": 5, "value": 10}], state)
+        result = await strategy.update([{"__id__": "b", "price": 3.0, "total_amount": 7, "value": 21}], state)
+        alert = result.alerts[0]
+        assert (alert["price"], alert["total_amount"], alert["value"]) == (2.0, 5, 10)
+        assert (alert["new_price"], alert["new_total"], alert["new_value"]) == (3.0, 7, 21)
+        assert alert["new_total_amount"] == 7
+        assert "__template__" not in alert
+
+    asyncio.run(scenario())
+
+
+def test_partial_snapshot_only_removes_offers_it_covered() -> None:
+    async def scenario() -> None:
+        strategy = LowestPriceStrategy("p", {"key": "price"})
+        state = MemoryState()
+        await strategy.update([_offer("a", 2.0), _offer("b", 3.0), _offer("c", 9.0)], state)
+
+        # The scan stopped after 3.0: "c" was not fetched, so it is not reported as removed.
+        unchanged = await strategy.update(PartialSnapshot([_offer("a", 2.0), _offer("b", 3.0)]), state)
+        assert unchanged.alerts == []
+        assert "c" in strategy.book
+
+        # "a" sat below the last price received, so its absence is real.
+        sold = await strategy.update(PartialSnapshot([_offer("b", 3.0), _offer("d", 4.0)]), state)
+        assert [a["id"] for a in sold.alerts] == ["a"]
+        assert sold.alerts[0]["new_id"] == "b"
+        assert "c" in strategy.book and "a" not in strategy.book
+
+    asyncio.run(scenario())
+
+
+def test_offers_without_ids_are_kept_apart() -> None:
+    async def scenario() -> None:
+        strategy = LowestPriceStrategy("p", {"key": "price"})
+        state = MemoryState()
+        first = await strategy.update([{"price": 3.0}, {"price": 1.0}, {"price": 2.0}], state)
+        assert first.tracking is not None and first.tracking["price"] == 1.0
+        assert len(strategy.book) == 3
+
+        sold = await strategy.update([{"price": 3.0}, {"price": 2.0}], state)
+        assert len(sold.alerts) == 1
+        assert (sold.alerts[0]["price"], sold.alerts[0]["new_price"]) == (1.0, 2.0)
+
+    asyncio.run(scenario())
+
+
+def test_forward_routes_only_new_offers_of_a_snapshot() -> None:
+    async def scenario() -> None:
+        strategy = ForwardStrategy("p", {"key": "price"})
+        state = MemoryState()
+        first = await strategy.update([_offer("a", 2.0), _offer("b", 3.0)], state)
+        assert [e["__id__"] for e in first.alerts] == ["a", "b"]
+
+        second = await strategy.update([_offer("a", 2.5), _offer("b", 3.0), _offer("c", 4.0)], state)
+        assert [e["__id__"] for e in second.alerts] == ["c"]
+
+        changed = ForwardStrategy("p", {"key": "price", "changed": True})
+        await changed.update([_offer("a", 2.0)], state)
+        assert [e["price"] for e in (await changed.update([_offer("a", 2.5)], state)).alerts] == [2.5]
+
+        deltas = ForwardStrategy("p", {"snapshot": False})
+        batch = [_offer("a", 2.0)]
+        assert (await deltas.update(batch, state)).alerts == batch
+        assert (await deltas.update(batch, state)).alerts == batch
+
+    asyncio.run(scenario())